@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING, Optional
 
 from vnpy.trader.constant import Direction
-from vnpy.trader.object import TickData, OrderData, TradeData, ContractData
+from vnpy.trader.object import TickData, OrderData, TradeData
 from vnpy.trader.utility import round_to
 
 from .template import SpreadAlgoTemplate
@@ -159,12 +159,11 @@ class SpreadTakerAlgo(SpreadAlgoTemplate):
     def send_leg_order(self, vt_symbol: str, leg_volume: float) -> None:
         """"""
         leg: LegData = self.spread.legs[vt_symbol]
-        leg_tick: Optional[TickData] = self.get_tick(vt_symbol)
-        leg_contract: Optional[ContractData] = self.get_contract(vt_symbol)
+        leg_tick: Optional[TickData] = leg.tick
 
         if leg_volume > 0:
-            price: float = leg_tick.ask_price_1 + leg_contract.pricetick * self.payup
+            price: float = leg_tick.ask_price_1 + leg.pricetick * self.payup
             self.send_order(leg.vt_symbol, price, abs(leg_volume), Direction.LONG)
         elif leg_volume < 0:
-            price: float = leg_tick.bid_price_1 - leg_contract.pricetick * self.payup
+            price: float = leg_tick.bid_price_1 - leg.pricetick * self.payup
             self.send_order(leg.vt_symbol, price, abs(leg_volume), Direction.SHORT)
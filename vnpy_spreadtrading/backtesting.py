@@ -1,16 +1,29 @@
 import traceback
 from collections import defaultdict
-from datetime import date, datetime, timedelta
-from typing import Callable, Type, Dict, List, Optional
+from copy import deepcopy
+from datetime import date, datetime, timedelta, tzinfo
+from typing import Callable, Type, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
 from functools import partial
+from logging import INFO
+from multiprocessing.shared_memory import SharedMemory
 
 import numpy as np
-from pandas import DataFrame
+from pandas import DataFrame, Index
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
-from vnpy.trader.constant import Direction, Offset, Exchange, Interval, Status
-from vnpy.trader.object import TradeData, BarData, TickData
+from vnpy.event import Event
+from vnpy.trader.constant import Direction, Offset, Exchange, Interval, Status, OrderType
+from vnpy.trader.event import EVENT_ORDER, EVENT_TRADE
+from vnpy.trader.object import (
+    TradeData,
+    BarData,
+    TickData,
+    OrderData,
+    ContractData,
+    OrderRequest,
+)
+from vnpy.trader.utility import extract_vt_symbol
 from vnpy.trader.optimize import (
     OptimizationSetting,
     check_optimization_setting,
@@ -19,8 +32,34 @@ from vnpy.trader.optimize import (
 )
 
 from .template import SpreadStrategyTemplate, SpreadAlgoTemplate
-from .base import SpreadData, BacktestingMode, load_bar_data, load_tick_data, EngineType
-
+from .base import (
+    SpreadData,
+    LegData,
+    BacktestingMode,
+    load_bar_data,
+    load_tick_data,
+    load_leg_tick_data,
+    EngineType,
+    SpreadBarSeries,
+    SPREAD_BAR_DTYPE,
+    get_timestamps,
+    get_datetimes,
+)
+from .algo import SpreadTakerAlgo
+from .cache import get_bar_cache, get_timestamp
+from .replay import ReplayEventEngine, ReplayMainEngine
+
+
+# Columns of tick history data shared with optimization processes
+HISTORY_TICK_DTYPE: np.dtype = np.dtype([
+    ("datetime", "i8"),
+    ("bid_price_1", "f8"),
+    ("ask_price_1", "f8"),
+    ("bid_volume_1", "f8"),
+    ("ask_volume_1", "f8"),
+    ("last_price", "f8"),
+    ("volume", "f8"),
+])
 
 INTERVAL_DELTA_MAP: Dict[Interval, timedelta] = {
     Interval.TICK: timedelta(milliseconds=1),
@@ -36,6 +75,12 @@ class BacktestingEngine:
     engine_type: EngineType = EngineType.BACKTESTING
     gateway_name: str = "BACKTESTING"
 
+    # Algo class used in leg tick mode
+    algo_class: Type[SpreadAlgoTemplate] = SpreadTakerAlgo
+
+    # Load spread bars through on-disk cache
+    bar_cache_active: bool = False
+
     def __init__(self) -> None:
         """"""
         self.spread: SpreadData = None
@@ -48,6 +93,7 @@ class BacktestingEngine:
         self.pricetick: float = 0
         self.capital: int = 1_000_000
         self.mode: BacktestingMode = BacktestingMode.BAR
+        self.ohlc: bool = False
 
         self.strategy_class: Type[SpreadStrategyTemplate] = None
         self.strategy: SpreadStrategyTemplate = None
@@ -64,6 +110,10 @@ class BacktestingEngine:
         self.algos: Dict[str, SpreadAlgoTemplate] = {}
         self.active_algos: Dict[str, SpreadAlgoTemplate] = {}
 
+        # Algo engine and timer for leg tick mode
+        self.algo_engine: BacktestingAlgoEngine = None
+        self.timer_time: float = 0
+
         self.trade_count: int = 0
         self.trades: Dict[str, TradeData] = {}
 
@@ -91,11 +141,15 @@ class BacktestingEngine:
         self.algos.clear()
         self.active_algos.clear()
 
+        self.algo_engine = None
+        self.timer_time = 0
+
         self.trade_count = 0
         self.trades.clear()
 
         self.logs.clear()
         self.daily_results.clear()
+        self.daily_df = None
 
     def set_parameters(
         self,
@@ -109,6 +163,7 @@ class BacktestingEngine:
         capital: int = 0,
         end: datetime = None,
         mode: BacktestingMode = BacktestingMode.BAR,
+        ohlc: bool = False,
     ) -> None:
         """"""
         self.spread = spread
@@ -121,6 +176,7 @@ class BacktestingEngine:
         self.capital = capital
         self.end = end
         self.mode = mode
+        self.ohlc = ohlc
 
     def add_strategy(self, strategy_class: type, setting: dict) -> None:
         """"""
@@ -142,16 +198,12 @@ class BacktestingEngine:
             return
 
         if self.mode == BacktestingMode.BAR:
-            self.history_data = load_bar_data(
-                spread=self.spread,
-                interval=self.interval,
-                start=self.start,
-                end=self.end,
-                pricetick=self.pricetick,
-                backtesting=True,
-            )
-        else:
+            self.history_data = self.load_spread_bars(self.start, self.end)
+        elif self.mode == BacktestingMode.TICK:
             self.history_data = load_tick_data(self.spread, self.start, self.end)
+        else:
+            self.output("Leg tick data will be loaded while playing back.")
+            return
 
         self.output(
             f"History data load complete, amount of data: {len(self.history_data)}"
@@ -161,8 +213,22 @@ class BacktestingEngine:
         """"""
         if self.mode == BacktestingMode.BAR:
             func = self.new_bar
-        else:
+            history_data: Iterable = self.history_data
+        elif self.mode == BacktestingMode.TICK:
             func = self.new_tick
+            history_data: Iterable = self.history_data
+        else:
+            for leg in self.spread.legs.values():
+                if not leg.pricetick or not leg.min_volume:
+                    self.output(
+                        f"Contract data of leg {leg.vt_symbol} not found, "
+                        "please update leg with contract before leg tick backtesting."
+                    )
+                    return
+
+            func = self.new_leg_tick
+            history_data: Iterable = load_leg_tick_data(self.spread, self.start, self.end)
+            self.algo_engine = BacktestingAlgoEngine(self)
 
         self.strategy.on_init()
         self.strategy.inited = True
@@ -172,7 +238,7 @@ class BacktestingEngine:
         self.strategy.trading = True
         self.output("Start playing back historical data.")
 
-        for data in self.history_data:
+        for data in history_data:
             try:
                 func(data)
             except Exception:
@@ -189,38 +255,123 @@ class BacktestingEngine:
         if not self.trades:
             self.output("The backtest trade record is empty.")
 
-        # Add trade data into daily reuslt.
-        for trade in self.trades.values():
-            d: date = trade.datetime.date()
-            daily_result = self.daily_results[d]
-            daily_result.add_trade(trade)
+        results: Dict[str, np.ndarray] = self.calculate_daily_arrays()
+        dates: List[date] = results.pop("date")
+        days: np.ndarray = results.pop("trade_day")
+
+        # Trades of each day are kept in the same order
+        order: np.ndarray = np.argsort(days, kind="stable")
+        trade_array: np.ndarray = np.empty(len(days), dtype=object)
+        trade_array[:] = list(self.trades.values())
+
+        groups: List[np.ndarray] = np.split(trade_array[order], np.cumsum(results["trade_count"])[:-1])
+        day_trades: List[list] = [group.tolist() for group in groups[:len(dates)]]
+
+        self.daily_df: DataFrame = DataFrame(
+            {
+                "close_price": results["close_price"],
+                "pre_close": results["pre_close"],
+                "trades": day_trades,
+                "trade_count": results["trade_count"],
+                "start_pos": results["start_pos"],
+                "end_pos": results["end_pos"],
+                "turnover": results["turnover"],
+                "commission": results["commission"],
+                "slippage": results["slippage"],
+                "trading_pnl": results["trading_pnl"],
+                "holding_pnl": results["holding_pnl"],
+                "total_pnl": results["total_pnl"],
+                "net_pnl": results["net_pnl"],
+            },
+            index=Index(dates, name="date"),
+        )
 
-        # Calculate daily result by iteration.
-        pre_close = 0
-        start_pos = 0
+        self.output("Day-to-day market watch profit/loss calculations completed.")
+        return self.daily_df
 
-        for daily_result in self.daily_results.values():
-            daily_result.calculate_pnl(
-                pre_close, start_pos, self.size, self.rate, self.slippage
-            )
+    def calculate_daily_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Calculate daily result with trade arrays grouped by day, day index
+        of each trade is also returned as "trade_day".
+        """
+        dates: List[date] = list(self.daily_results.keys())
+        day_count: int = len(dates)
+        date_index: Dict[date, int] = {d: n for n, d in enumerate(dates)}
 
-            pre_close = daily_result.close_price
-            start_pos = daily_result.end_pos
+        close_prices: np.ndarray = np.array(
+            [daily_result.close_price for daily_result in self.daily_results.values()],
+            dtype=float,
+        )
 
-        # Generate dataframe
-        results: defaultdict = defaultdict(list)
+        # Collect trade data into arrays field by field, which avoids
+        # creating a temporary tuple for every trade
+        trades: List[TradeData] = list(self.trades.values())
 
-        for daily_result in self.daily_results.values():
-            for key, value in daily_result.__dict__.items():
-                results[key].append(value)
+        days: np.ndarray = np.array(
+            [date_index[trade.datetime.date()] for trade in trades], dtype=np.int64
+        )
+        longs: np.ndarray = np.array(
+            [trade.direction is Direction.LONG for trade in trades], dtype=bool
+        )
+        prices: np.ndarray = np.array([trade.price for trade in trades], dtype=float)
+        volumes: np.ndarray = np.array([trade.volume for trade in trades], dtype=float)
+        values: np.ndarray = np.array([trade.value for trade in trades], dtype=float)
 
-        self.daily_df: DataFrame = DataFrame.from_dict(results).set_index("date")
+        changes: np.ndarray = np.where(longs, volumes, -volumes)
 
-        self.output("Day-to-day market watch profit/loss calculations completed.")
-        return self.daily_df
+        def sum_by_day(data: np.ndarray) -> np.ndarray:
+            return np.bincount(days, weights=data, minlength=day_count)
+
+        # Position of each day
+        pos_changes: np.ndarray = sum_by_day(changes)
+        end_pos: np.ndarray = np.cumsum(pos_changes)
+        start_pos: np.ndarray = np.concatenate(([0], end_pos[:-1]))
+
+        # If no pre_close provided on the first day,
+        # use value 1 to avoid zero division error
+        pre_close: np.ndarray = np.concatenate(([0], close_prices[:-1]))
+        pre_close[pre_close == 0] = 1
+
+        # Holding pnl is the pnl from holding position at day start, and
+        # trading pnl is the pnl from new trade during the day
+        holding_pnl: np.ndarray = start_pos * (close_prices - pre_close) * self.size
+        trading_pnl: np.ndarray = sum_by_day(
+            changes * (close_prices[days] - prices)
+        ) * self.size
+
+        turnover: np.ndarray = sum_by_day(volumes * values) * self.size
+        commission: np.ndarray = turnover * self.rate
+        slippage: np.ndarray = sum_by_day(volumes) * self.size * self.slippage
+
+        # Net pnl takes account of commission and slippage cost
+        total_pnl: np.ndarray = trading_pnl + holding_pnl
+        net_pnl: np.ndarray = total_pnl - commission - slippage
+
+        return {
+            "date": dates,
+            "trade_day": days,
+            "close_price": close_prices,
+            "pre_close": pre_close,
+            "trade_count": np.bincount(days, minlength=day_count),
+            "start_pos": start_pos,
+            "end_pos": end_pos,
+            "turnover": turnover,
+            "commission": commission,
+            "slippage": slippage,
+            "trading_pnl": trading_pnl,
+            "holding_pnl": holding_pnl,
+            "total_pnl": total_pnl,
+            "net_pnl": net_pnl,
+        }
 
     def calculate_statistics(self, df: DataFrame = None, output=True) -> dict:
-        """"""
+        """
+        Statistics are calculated with daily arrays directly if output is
+        disabled and daily result DataFrame is not calculated.
+        """
+        if df is None and self.daily_df is None and not output:
+            return self.calculate_array_statistics()
+
         self.output("Begin calculating strategy statistics metrics.")
 
         # Check DataFrame input exterior
@@ -334,7 +485,7 @@ class BacktestingEngine:
             self.output(f"Total return:\t{total_return:,.2f}%")
             self.output(f"Annual return:\t{annual_return:,.2f}%")
             self.output(f"Max drawdown:\t{max_drawdown:,.2f}")
-            self.output(f"Max drawdown \%:\t{{max_ddpercent:,.2f}%")
+            self.output(f"Max drawdown %:\t{max_ddpercent:,.2f}%")
             self.output(f"Max drawdown duration:\t{max_drawdown_duration}")
 
             self.output(f"Total net P&L:\t{total_net_pnl:,.2f}")
@@ -385,6 +536,123 @@ class BacktestingEngine:
 
         return statistics
 
+    def calculate_array_statistics(self) -> dict:
+        """
+        Calculate the same statistics as calculate_statistics with numpy
+        arrays only, for evaluations of optimization.
+        """
+        results: Dict[str, np.ndarray] = self.calculate_daily_arrays()
+        dates: List[date] = results["date"]
+        net_pnl: np.ndarray = results["net_pnl"]
+
+        statistics: dict = {
+            "start_date": "",
+            "end_date": "",
+            "total_days": 0,
+            "profit_days": 0,
+            "loss_days": 0,
+            "capital": self.capital,
+            "end_balance": 0,
+            "max_drawdown": 0,
+            "max_ddpercent": 0,
+            "max_drawdown_duration": 0,
+            "total_net_pnl": 0,
+            "daily_net_pnl": 0,
+            "total_commission": 0,
+            "daily_commission": 0,
+            "total_slippage": 0,
+            "daily_slippage": 0,
+            "total_turnover": 0,
+            "daily_turnover": 0,
+            "total_trade_count": 0,
+            "daily_trade_count": 0,
+            "total_return": 0,
+            "annual_return": 0,
+            "daily_return": 0,
+            "return_std": 0,
+            "sharpe_ratio": 0,
+            "return_drawdown_ratio": 0,
+        }
+
+        if not dates:
+            return statistics
+
+        # Calculate balance related time series data
+        balance: np.ndarray = np.cumsum(net_pnl) + self.capital
+
+        # All balance value needs to be positive
+        if not (balance > 0).all():
+            self.output(
+                "Burst positions (funds less than or equal to 0) in backtesting, unable to calculate strategy stats metrics"
+            )
+            return statistics
+
+        returns: np.ndarray = np.zeros(len(balance))
+        returns[1:] = np.log(balance[1:] / balance[:-1])
+
+        highlevel: np.ndarray = np.maximum.accumulate(balance)
+        drawdown: np.ndarray = balance - highlevel
+        ddpercent: np.ndarray = drawdown / highlevel * 100
+
+        # Calculate statistics value
+        total_days: int = len(dates)
+
+        max_drawdown_end: int = int(np.argmin(drawdown))
+        max_drawdown_start: int = int(np.argmax(balance[:max_drawdown_end + 1]))
+
+        end_balance: float = balance[-1]
+        max_ddpercent: float = ddpercent.min()
+
+        total_net_pnl: float = net_pnl.sum()
+        total_commission: float = results["commission"].sum()
+        total_slippage: float = results["slippage"].sum()
+        total_turnover: float = results["turnover"].sum()
+        total_trade_count: int = results["trade_count"].sum()
+
+        total_return: float = (end_balance / self.capital - 1) * 100
+        daily_return: float = returns.mean() * 100
+
+        # Sample standard deviation, the same as pandas
+        if total_days > 1:
+            return_std: float = returns.std(ddof=1) * 100
+        else:
+            return_std: float = np.nan
+
+        if return_std:
+            sharpe_ratio: float = daily_return / return_std * np.sqrt(240)
+        else:
+            sharpe_ratio: float = 0
+
+        statistics.update({
+            "start_date": dates[0],
+            "end_date": dates[-1],
+            "total_days": total_days,
+            "profit_days": int((net_pnl > 0).sum()),
+            "loss_days": int((net_pnl < 0).sum()),
+            "end_balance": end_balance,
+            "max_drawdown": drawdown.min(),
+            "max_ddpercent": max_ddpercent,
+            "max_drawdown_duration": (dates[max_drawdown_end] - dates[max_drawdown_start]).days,
+            "total_net_pnl": total_net_pnl,
+            "daily_net_pnl": total_net_pnl / total_days,
+            "total_commission": total_commission,
+            "daily_commission": total_commission / total_days,
+            "total_slippage": total_slippage,
+            "daily_slippage": total_slippage / total_days,
+            "total_turnover": total_turnover,
+            "daily_turnover": total_turnover / total_days,
+            "total_trade_count": total_trade_count,
+            "daily_trade_count": total_trade_count / total_days,
+            "total_return": total_return,
+            "annual_return": total_return / total_days * 240,
+            "daily_return": daily_return,
+            "return_std": return_std,
+            "sharpe_ratio": sharpe_ratio,
+            "return_drawdown_ratio": -total_return / max_ddpercent,
+        })
+
+        return statistics
+
     def show_chart(self, df: DataFrame = None) -> None:
         """"""
         # Check DataFrame input exterior
@@ -431,14 +699,22 @@ class BacktestingEngine:
         if not check_optimization_setting(optimization_setting):
             return
 
-        evaluate_func: callable = wrap_evaluate(self, optimization_setting.target_name)
-        results: list = run_bf_optimization(
-            evaluate_func,
-            optimization_setting,
-            get_target_value,
-            output=self.output,
+        history: Optional[HistoryStore] = self.share_history_data()
+        evaluate_func: callable = wrap_evaluate(
+            self, optimization_setting.target_name, history
         )
 
+        try:
+            results: list = run_bf_optimization(
+                evaluate_func,
+                optimization_setting,
+                get_target_value,
+                output=self.output,
+            )
+        finally:
+            if history:
+                history.close()
+
         if output:
             for result in results:
                 msg: str = f"Parameters: {result[0]}, Target: {result[1]}"
@@ -455,11 +731,19 @@ class BacktestingEngine:
         if not check_optimization_setting(optimization_setting):
             return
 
-        evaluate_func: callable = wrap_evaluate(self, optimization_setting.target_name)
-        results: list = run_ga_optimization(
-            evaluate_func, optimization_setting, get_target_value, output=self.output
+        history: Optional[HistoryStore] = self.share_history_data()
+        evaluate_func: callable = wrap_evaluate(
+            self, optimization_setting.target_name, history
         )
 
+        try:
+            results: list = run_ga_optimization(
+                evaluate_func, optimization_setting, get_target_value, output=self.output
+            )
+        finally:
+            if history:
+                history.close()
+
         if output:
             for result in results:
                 msg: str = f"Parameters: {result[0]}, Target: {result[1]}"
@@ -467,6 +751,96 @@ class BacktestingEngine:
 
         return results
 
+    def share_history_data(self) -> Optional["HistoryStore"]:
+        """
+        Copy history data into shared memory attached by optimization
+        processes, so that history data is loaded only once for all
+        parameter settings.
+        """
+        # Leg ticks are loaded while playing back
+        if self.mode == BacktestingMode.LEG_TICK:
+            return None
+
+        if not self.history_data:
+            self.load_data()
+
+            if not self.history_data:
+                return None
+
+        # History loaded by strategy in on_init is shared together, placed
+        # before data of backtesting period
+        days, interval = self.probe_init_days()
+        init_data: list = []
+        init_start: Optional[datetime] = None
+
+        if days:
+            init_start, init_end = self.get_init_range(days, interval)
+
+            if self.mode == BacktestingMode.BAR:
+                init_data = self.load_spread_bars(init_start, init_end)
+            else:
+                init_data = load_tick_data(self.spread, init_start, init_end)
+
+        if self.mode == BacktestingMode.BAR:
+            data: np.ndarray = np.concatenate([
+                get_bar_array(init_data),
+                get_bar_array(self.history_data)
+            ])
+        else:
+            data: np.ndarray = np.concatenate([
+                get_tick_array(init_data),
+                get_tick_array(self.history_data)
+            ])
+
+        return HistoryStore(
+            data,
+            self.mode,
+            self.spread.name,
+            self.interval,
+            self.history_data[0].datetime.tzinfo,
+            len(init_data),
+            init_start,
+        )
+
+    def probe_init_days(self) -> Tuple[int, Interval]:
+        """
+        Run on_init of a new strategy instance with probe engine, to get
+        days and interval of history loaded for the current backtesting mode.
+        """
+        probe: InitProbeEngine = InitProbeEngine()
+        probe.set_parameters(
+            spread=deepcopy(self.spread),
+            interval=self.interval,
+            start=self.start,
+            rate=self.rate,
+            slippage=self.slippage,
+            size=self.size,
+            pricetick=self.pricetick,
+            capital=self.capital,
+            end=self.end,
+            mode=self.mode,
+            ohlc=self.ohlc,
+        )
+
+        try:
+            probe.add_strategy(self.strategy_class, self.strategy.get_parameters())
+            probe.strategy.on_init()
+        except Exception:
+            self.output("Failed to probe history loaded in strategy initialization.")
+            self.output(traceback.format_exc())
+            return 0, self.interval
+
+        if self.mode == BacktestingMode.BAR:
+            return probe.bar_days, probe.bar_interval
+        else:
+            return probe.tick_days, Interval.TICK
+
+    def get_init_range(self, days: int, interval: Interval) -> Tuple[datetime, datetime]:
+        """Get start and end of history loaded for strategy initialization."""
+        init_end: datetime = self.start - INTERVAL_DELTA_MAP[interval]
+        init_start: datetime = self.start - timedelta(days=days)
+        return init_start, init_end
+
     def update_daily_close(self, price: float) -> None:
         """"""
         d: date = self.datetime.date()
@@ -503,6 +877,68 @@ class BacktestingEngine:
 
         self.update_daily_close(tick.last_price)
 
+    def new_leg_tick(self, tick: TickData) -> None:
+        """
+        Update leg tick and recalculate spread, orders of algos are matched
+        with leg tick first.
+        """
+        self.datetime = tick.datetime
+        algo_engine: BacktestingAlgoEngine = self.algo_engine
+
+        # Timer of algos is driven by time of tick, at most 60 seconds once
+        timestamp: float = tick.datetime.timestamp()
+        if not self.timer_time:
+            self.timer_time = timestamp
+
+        seconds: int = int(timestamp - self.timer_time)
+        if seconds > 0:
+            self.timer_time += seconds
+
+            for _ in range(min(seconds, 60)):
+                algo_engine.update_timer()
+
+        algo_engine.cross_order(tick)
+
+        leg: Optional[LegData] = self.spread.legs.get(tick.vt_symbol, None)
+        if not leg:
+            return
+        leg.update_tick(tick)
+
+        calculated: bool = self.spread.calculate_leg_price(tick.vt_symbol)
+
+        algo_engine.update_tick(tick)
+
+        if calculated:
+            self.spread.datetime = tick.datetime
+            self.strategy.on_spread_data()
+
+            mid_price: float = (self.spread.bid_price + self.spread.ask_price) / 2
+            self.update_daily_close(mid_price)
+
+    def update_algo_trade(self, algo: SpreadAlgoTemplate, volume: float, price: float) -> None:
+        """Record spread trade of algo in leg tick mode."""
+        self.trade_count += 1
+
+        if volume > 0:
+            direction: Direction = Direction.LONG
+        else:
+            direction: Direction = Direction.SHORT
+
+        trade: TradeData = TradeData(
+            symbol=self.spread.name,
+            exchange=Exchange.LOCAL,
+            orderid=algo.algoid,
+            tradeid=str(self.trade_count),
+            direction=direction,
+            price=price,
+            volume=abs(volume),
+            datetime=self.datetime,
+            gateway_name=self.gateway_name,
+        )
+        trade.value = price
+
+        self.trades[trade.vt_tradeid] = trade
+
     def cross_algo(self) -> None:
         """
         Cross limit order with last bar/tick data.
@@ -570,38 +1006,58 @@ class BacktestingEngine:
 
     def load_bar(
         self, spread: SpreadData, days: int, interval: Interval, callback: Callable
-    ) -> None:
+    ) -> Sequence[BarData]:
         """"""
         self.callback = callback
 
-        init_end = self.start - INTERVAL_DELTA_MAP[interval]
-        init_start = self.start - timedelta(days=days)
+        init_start, init_end = self.get_init_range(days, interval)
 
-        bars: List[BarData] = load_bar_data(
-            spread=self.spread,
-            interval=self.interval,
-            start=init_start,
-            end=init_end,
-            pricetick=self.pricetick,
-            backtesting=True,
-        )
+        # Bars shared by optimization are used if they cover the range
+        bars: Optional[Sequence[BarData]] = None
+        if isinstance(self.history_data, HistoryStore) and self.mode == BacktestingMode.BAR:
+            bars = self.history_data.get_init_data(init_start, init_end)
+
+        if bars is None:
+            bars = self.load_spread_bars(init_start, init_end)
 
         for bar in bars:
             callback(bar)
 
         return bars
 
-    def load_tick(self, spread: SpreadData, days: int, callback: Callable) -> None:
+    def load_spread_bars(self, start: datetime, end: datetime) -> SpreadBarSeries:
+        """"""
+        if self.bar_cache_active:
+            func: Callable = get_bar_cache().load_bar_data
+        else:
+            func: Callable = load_bar_data
+
+        return func(
+            spread=self.spread,
+            interval=self.interval,
+            start=start,
+            end=end,
+            pricetick=self.pricetick,
+            backtesting=True,
+            ohlc=self.ohlc,
+        )
+
+    def load_tick(self, spread: SpreadData, days: int, callback: Callable) -> Sequence[TickData]:
         """"""
         self.days = days
 
-        init_end = self.start - INTERVAL_DELTA_MAP[Interval.TICK]
-        init_start = self.start - timedelta(days=days)
+        init_start, init_end = self.get_init_range(days, Interval.TICK)
+
+        # Ticks shared by optimization are used if they cover the range
+        ticks: Optional[Sequence[TickData]] = None
+        if isinstance(self.history_data, HistoryStore) and self.mode == BacktestingMode.TICK:
+            ticks = self.history_data.get_init_data(init_start, init_end)
 
-        ticks: List[TickData] = load_tick_data(self.spread, init_start, init_end)
+        if ticks is None:
+            ticks = load_tick_data(self.spread, init_start, init_end)
 
         for tick in ticks:
-            callback(callback)
+            callback(tick)
 
         return ticks
 
@@ -621,6 +1077,13 @@ class BacktestingEngine:
         self.algo_count += 1
         algoid: str = str(self.algo_count)
 
+        if self.mode == BacktestingMode.LEG_TICK:
+            algo: SpreadAlgoTemplate = self.algo_engine.start_algo(
+                algoid, direction, price, volume, payup, interval, lock, extra
+            )
+            self.algos[algoid] = algo
+            return algoid
+
         algo: SpreadAlgoTemplate = SpreadAlgoTemplate(
             self,
             algoid,
@@ -641,6 +1104,10 @@ class BacktestingEngine:
 
     def stop_algo(self, strategy: SpreadStrategyTemplate, algoid: str) -> None:
         """"""
+        if self.mode == BacktestingMode.LEG_TICK:
+            self.algo_engine.stop_algo(algoid)
+            return
+
         if algoid not in self.active_algos:
             return
         algo: SpreadAlgoTemplate = self.active_algos.pop(algoid)
@@ -667,7 +1134,9 @@ class BacktestingEngine:
         """
         pass
 
-    def write_strategy_log(self, strategy: SpreadStrategyTemplate, msg: str) -> None:
+    def write_strategy_log(
+        self, strategy: SpreadStrategyTemplate, msg: str, level: int = INFO
+    ) -> None:
         """
         Write log message.
         """
@@ -692,11 +1161,227 @@ class BacktestingEngine:
         """
         pass
 
-    def write_algo_log(self, algo: SpreadAlgoTemplate, msg: str) -> None:
+    def write_algo_log(
+        self, algo: SpreadAlgoTemplate, msg: str, level: int = INFO
+    ) -> None:
         """"""
         pass
 
 
+class InitProbeEngine(BacktestingEngine):
+    """
+    Backtesting engine only recording days of history loaded by strategy
+    in on_init, without loading any data.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        super().__init__()
+
+        self.bar_days: int = 0
+        self.bar_interval: Interval = None
+        self.tick_days: int = 0
+
+    def output(self, msg) -> None:
+        """"""
+        pass
+
+    def load_bar(
+        self, spread: SpreadData, days: int, interval: Interval, callback: Callable
+    ) -> list:
+        """"""
+        if days >= self.bar_days:
+            self.bar_days = days
+            self.bar_interval = interval
+        return []
+
+    def load_tick(self, spread: SpreadData, days: int, callback: Callable) -> list:
+        """"""
+        self.tick_days = max(self.tick_days, days)
+        return []
+
+
+class BacktestingAlgoEngine:
+    """
+    Algo engine for leg tick backtesting, orders of algos are matched with
+    tick of each leg, and spread trades are recorded with traded volume
+    and price of algos.
+    """
+
+    def __init__(self, engine: BacktestingEngine) -> None:
+        """"""
+        self.engine: BacktestingEngine = engine
+        self.spread: SpreadData = engine.spread
+
+        # Order and trade events are processed after the current step
+        self.event_engine: ReplayEventEngine = ReplayEventEngine()
+        self.matcher: ReplayMainEngine = ReplayMainEngine(self.event_engine)
+        self.matcher.gateway_name = engine.gateway_name
+
+        self.event_engine.register(EVENT_ORDER, self.process_order_event)
+        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
+
+        self.algos: Dict[str, SpreadAlgoTemplate] = {}
+        self.order_algo_map: Dict[str, SpreadAlgoTemplate] = {}
+        self.algo_orderids: Dict[str, List[str]] = defaultdict(list)
+
+        # Traded volume and cost of each algo recorded as spread trade
+        self.algo_traded: Dict[str, Tuple[float, float]] = {}
+
+        self.timer_count: int = 0
+
+    def start_algo(
+        self,
+        algoid: str,
+        direction: Direction,
+        price: float,
+        volume: float,
+        payup: int,
+        interval: int,
+        lock: bool,
+        extra: dict,
+    ) -> SpreadAlgoTemplate:
+        """"""
+        algo: SpreadAlgoTemplate = self.engine.algo_class(
+            self, algoid, self.spread, direction, price, volume, payup, interval, lock, extra
+        )
+        algo.timer_start = self.timer_count
+        self.algos[algoid] = algo
+
+        return algo
+
+    def stop_algo(self, algoid: str) -> None:
+        """"""
+        algo: Optional[SpreadAlgoTemplate] = self.algos.get(algoid, None)
+        if algo:
+            algo.stop()
+            self.event_engine.process_events()
+
+    def update_timer(self) -> None:
+        """"""
+        self.timer_count += 1
+
+        for algo in list(self.algos.values()):
+            if self.timer_count - algo.timer_start > algo.interval:
+                algo.timer_start = self.timer_count
+                algo.update_timer()
+
+        self.event_engine.process_events()
+
+    def cross_order(self, tick: TickData) -> None:
+        """"""
+        self.matcher.update_tick(tick)
+        self.event_engine.process_events()
+
+    def update_tick(self, tick: TickData) -> None:
+        """"""
+        for algo in list(self.algos.values()):
+            if algo.is_active():
+                algo.update_tick(tick)
+
+        self.event_engine.process_events()
+
+    def process_order_event(self, event: Event) -> None:
+        """"""
+        order: OrderData = event.data
+
+        algo: Optional[SpreadAlgoTemplate] = self.order_algo_map.get(order.vt_orderid, None)
+        if algo and algo.is_active():
+            algo.update_order(order)
+
+    def process_trade_event(self, event: Event) -> None:
+        """"""
+        trade: TradeData = event.data
+
+        self.spread.update_trade(trade)
+        self.spread.calculate_pos()
+        self.engine.strategy.on_spread_pos()
+
+        algo: Optional[SpreadAlgoTemplate] = self.order_algo_map.get(trade.vt_orderid, None)
+        if algo and algo.is_active():
+            algo.update_trade(trade)
+
+    def send_order(
+        self,
+        algo: SpreadAlgoTemplate,
+        vt_symbol: str,
+        price: float,
+        volume: float,
+        direction: Direction,
+        lock: bool,
+        fak: bool,
+    ) -> List[str]:
+        """"""
+        symbol, exchange = extract_vt_symbol(vt_symbol)
+
+        if fak:
+            order_type: OrderType = OrderType.FAK
+        else:
+            order_type: OrderType = OrderType.LIMIT
+
+        req: OrderRequest = OrderRequest(
+            symbol=symbol,
+            exchange=exchange,
+            direction=direction,
+            offset=Offset.OPEN,
+            type=order_type,
+            price=price,
+            volume=volume,
+        )
+
+        vt_orderid: str = self.matcher.send_order(req, self.engine.gateway_name)
+        self.order_algo_map[vt_orderid] = algo
+        self.algo_orderids[algo.algoid].append(vt_orderid)
+
+        return [vt_orderid]
+
+    def cancel_order(self, algo: SpreadAlgoTemplate, vt_orderid: str) -> None:
+        """"""
+        order: Optional[OrderData] = self.matcher.get_order(vt_orderid)
+        if order:
+            self.matcher.cancel_order(order.create_cancel_request(), self.engine.gateway_name)
+
+    def put_algo_event(self, algo: SpreadAlgoTemplate) -> None:
+        """Record spread trade if traded volume of algo changed."""
+        last_traded, last_cost = self.algo_traded.get(algo.algoid, (0, 0))
+
+        if algo.traded != last_traded:
+            cost: float = algo.traded * algo.traded_price
+            volume: float = algo.traded - last_traded
+            price: float = (cost - last_cost) / volume
+
+            self.engine.update_algo_trade(algo, volume, price)
+            self.algo_traded[algo.algoid] = (algo.traded, cost)
+
+        self.engine.strategy.update_spread_algo(algo)
+
+        if not algo.is_active():
+            self.finish_algo(algo)
+
+    def finish_algo(self, algo: SpreadAlgoTemplate) -> None:
+        """Remove finished algo and its orders to keep memory bounded."""
+        self.algos.pop(algo.algoid, None)
+        self.algo_traded.pop(algo.algoid, None)
+
+        for vt_orderid in self.algo_orderids.pop(algo.algoid, []):
+            self.order_algo_map.pop(vt_orderid, None)
+            self.matcher.orders.pop(vt_orderid, None)
+
+    def write_algo_log(
+        self, algo: SpreadAlgoTemplate, msg: str, level: int = INFO
+    ) -> None:
+        """"""
+        pass
+
+    def get_tick(self, vt_symbol: str) -> Optional[TickData]:
+        """"""
+        return self.spread.legs[vt_symbol].tick
+
+    def get_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """"""
+        return self.spread.legs[vt_symbol].contract
+
+
 class DailyResult:
     """"""
 
@@ -782,6 +1467,9 @@ def evaluate(
     pricetick: float,
     capital: int,
     end: datetime,
+    ohlc: bool,
+    mode: BacktestingMode,
+    history: Optional["HistoryStore"],
     setting: dict,
 ) -> tuple:
     """
@@ -799,19 +1487,28 @@ def evaluate(
         pricetick=pricetick,
         capital=capital,
         end=end,
+        mode=mode,
+        ohlc=ohlc,
     )
 
     engine.add_strategy(strategy_class, setting)
-    engine.load_data()
+
+    if history:
+        engine.history_data = history
+    else:
+        engine.load_data()
     engine.run_backtesting()
-    engine.calculate_result()
+
+    # Statistics are calculated with arrays without daily DataFrame
     statistics: dict = engine.calculate_statistics(output=False)
 
     target_value: float = statistics[target_name]
     return (setting, target_value, statistics)
 
 
-def wrap_evaluate(engine: BacktestingEngine, target_name: str) -> callable:
+def wrap_evaluate(
+    engine: BacktestingEngine, target_name: str, history: Optional["HistoryStore"] = None
+) -> callable:
     """
     Wrap evaluate function with given setting from backtesting engine.
     """
@@ -828,6 +1525,9 @@ def wrap_evaluate(engine: BacktestingEngine, target_name: str) -> callable:
         engine.pricetick,
         engine.capital,
         engine.end,
+        engine.ohlc,
+        engine.mode,
+        history,
     )
     return func
 
@@ -837,3 +1537,262 @@ def get_target_value(result: list) -> float:
     Get target value for sorting optimization results.
     """
     return result[1]
+
+
+# Shared memory and datetimes of history store attached in current process
+ATTACHED_MEMORIES: Dict[str, SharedMemory] = {}
+ATTACHED_DATETIMES: Dict[str, List[datetime]] = {}
+
+
+class HistoryStore(Sequence):
+    """
+    Columnar history data in shared memory.
+
+    Child processes attach to the same memory without copying when the
+    store is unpickled, and rows are accessed with lightweight views
+    instead of BarData/TickData.
+
+    The first init_count rows are history loaded for strategy
+    initialization from init_start, which are not included in sequence.
+    """
+
+    def __init__(
+        self,
+        data: np.ndarray,
+        mode: BacktestingMode,
+        name: str,
+        interval: Interval,
+        tz: Optional[tzinfo],
+        init_count: int = 0,
+        init_start: Optional[datetime] = None,
+    ) -> None:
+        """Create shared memory and copy data into it."""
+        self.mode: BacktestingMode = mode
+        self.name: str = name
+        self.interval: Interval = interval
+        self.tz: Optional[tzinfo] = tz
+        self.length: int = len(data)
+        self.init_count: int = init_count
+        self.init_start: Optional[datetime] = init_start
+
+        self.owner: bool = True
+        self.memory: SharedMemory = SharedMemory(create=True, size=max(data.nbytes, 1))
+
+        self.init_data()
+        self.data[:] = data
+
+    def __getstate__(self) -> dict:
+        """Only name of shared memory is pickled."""
+        return {
+            "mode": self.mode,
+            "name": self.name,
+            "interval": self.interval,
+            "tz": self.tz,
+            "length": self.length,
+            "init_count": self.init_count,
+            "init_start": self.init_start,
+            "memory_name": self.memory.name,
+        }
+
+    def __setstate__(self, state: dict) -> None:
+        """Attach to shared memory created by parent process."""
+        memory_name: str = state.pop("memory_name")
+        self.__dict__.update(state)
+
+        memory: Optional[SharedMemory] = ATTACHED_MEMORIES.get(memory_name, None)
+        if not memory:
+            memory = SharedMemory(name=memory_name)
+            ATTACHED_MEMORIES[memory_name] = memory
+
+        self.owner = False
+        self.memory = memory
+        self.init_data()
+
+    def init_data(self) -> None:
+        """"""
+        if self.mode == BacktestingMode.BAR:
+            dtype: np.dtype = SPREAD_BAR_DTYPE
+            self.view_class: type = BarView
+        else:
+            dtype: np.dtype = HISTORY_TICK_DTYPE
+            self.view_class: type = TickView
+
+        self.data: np.ndarray = np.ndarray(self.length, dtype=dtype, buffer=self.memory.buf)
+        self.columns: Dict[str, np.ndarray] = {field: self.data[field] for field in dtype.names}
+
+    def __len__(self) -> int:
+        """"""
+        return self.length - self.init_count
+
+    def __getitem__(self, index: int) -> "HistoryView":
+        """"""
+        count: int = len(self)
+
+        if isinstance(index, slice):
+            return [self[n] for n in range(*index.indices(count))]
+
+        if index < 0:
+            index += count
+        if not 0 <= index < count:
+            raise IndexError("history store index out of range")
+
+        index += self.init_count
+        return self.view_class(self, index, self.get_datetimes()[index])
+
+    def __iter__(self) -> Iterator["HistoryView"]:
+        """"""
+        view_class: type = self.view_class
+        datetimes: List[datetime] = self.get_datetimes()
+
+        for index in range(self.init_count, self.length):
+            yield view_class(self, index, datetimes[index])
+
+    def get_init_data(self, start: datetime, end: datetime) -> Optional[List["HistoryView"]]:
+        """
+        Get rows of strategy initialization history between start and end,
+        return None if start is not covered.
+        """
+        if not self.init_start or get_timestamp(start) < get_timestamp(self.init_start):
+            return None
+
+        timestamps: np.ndarray = self.columns["datetime"][:self.init_count]
+        left: int = int(np.searchsorted(timestamps, get_timestamp(start), side="left"))
+        right: int = int(np.searchsorted(timestamps, get_timestamp(end), side="right"))
+
+        datetimes: List[datetime] = self.get_datetimes()
+        return [self.view_class(self, index, datetimes[index]) for index in range(left, right)]
+
+    def get_datetimes(self) -> List[datetime]:
+        """Datetimes are converted only once in each process."""
+        datetimes: Optional[List[datetime]] = ATTACHED_DATETIMES.get(self.memory.name, None)
+
+        if datetimes is None:
+            datetimes = get_datetimes(self.columns["datetime"], self.tz)
+            ATTACHED_DATETIMES[self.memory.name] = datetimes
+
+        return datetimes
+
+    def close(self) -> None:
+        """Release shared memory, which is removed if created by this store."""
+        ATTACHED_DATETIMES.pop(self.memory.name, None)
+
+        # Arrays must be released before closing memory
+        self.data = None
+        self.columns = {}
+
+        self.memory.close()
+        if self.owner:
+            self.memory.unlink()
+        else:
+            ATTACHED_MEMORIES.pop(self.memory.name, None)
+
+
+def column_property(field: str) -> property:
+    """Property reading value of field from history store columns."""
+    def get_value(view: "HistoryView") -> float:
+        return float(view.store.columns[field][view.index])
+
+    return property(get_value)
+
+
+class HistoryView:
+    """Row of history store, with the same fields as BarData/TickData."""
+
+    __slots__ = ("store", "index", "datetime")
+
+    exchange: Exchange = Exchange.LOCAL
+    gateway_name: str = "DB"
+    turnover: float = 0
+    open_interest: float = 0
+
+    def __init__(self, store: HistoryStore, index: int, dt: datetime) -> None:
+        """"""
+        self.store: HistoryStore = store
+        self.index: int = index
+        self.datetime: datetime = dt
+
+    @property
+    def symbol(self) -> str:
+        """"""
+        return self.store.name
+
+    @property
+    def vt_symbol(self) -> str:
+        """"""
+        return f"{self.store.name}.{Exchange.LOCAL.value}"
+
+
+class BarView(HistoryView):
+    """"""
+
+    __slots__ = ()
+
+    open_price: float = column_property("open_price")
+    high_price: float = column_property("high_price")
+    low_price: float = column_property("low_price")
+    close_price: float = column_property("close_price")
+    volume: float = column_property("volume")
+    value: float = column_property("value")
+
+    @property
+    def interval(self) -> Interval:
+        """"""
+        return self.store.interval
+
+
+class TickView(HistoryView):
+    """"""
+
+    __slots__ = ()
+
+    bid_price_1: float = column_property("bid_price_1")
+    ask_price_1: float = column_property("ask_price_1")
+    bid_volume_1: float = column_property("bid_volume_1")
+    ask_volume_1: float = column_property("ask_volume_1")
+    last_price: float = column_property("last_price")
+    volume: float = column_property("volume")
+
+    last_volume: float = 0
+    limit_up: float = 0
+    limit_down: float = 0
+
+
+def get_bar_array(bars: Sequence[BarData]) -> np.ndarray:
+    """Convert spread bars into structured array."""
+    if isinstance(bars, SpreadBarSeries):
+        return bars.to_array()
+
+    rows: List[tuple] = [
+        (
+            0,
+            bar.open_price,
+            bar.high_price,
+            bar.low_price,
+            bar.close_price,
+            bar.volume,
+            getattr(bar, "value", 0),
+        )
+        for bar in bars
+    ]
+    data: np.ndarray = np.array(rows, dtype=SPREAD_BAR_DTYPE)
+    data["datetime"] = get_timestamps([bar.datetime for bar in bars])
+    return data
+
+
+def get_tick_array(ticks: Sequence[TickData]) -> np.ndarray:
+    """Convert spread ticks into structured array."""
+    rows: List[tuple] = [
+        (
+            0,
+            tick.bid_price_1,
+            tick.ask_price_1,
+            tick.bid_volume_1,
+            tick.ask_volume_1,
+            tick.last_price,
+            tick.volume,
+        )
+        for tick in ticks
+    ]
+    data: np.ndarray = np.array(rows, dtype=HISTORY_TICK_DTYPE)
+    data["datetime"] = get_timestamps([tick.datetime for tick in ticks])
+    return data
@@ -1,9 +1,17 @@
+import ast
+import heapq
 from collections import defaultdict
-from typing import Any, Dict, List, Optional, Callable
-from datetime import datetime
+from collections.abc import Sequence
+from decimal import Decimal
+from itertools import product
+from typing import Any, Dict, Iterator, List, Optional, Callable, Tuple
+from datetime import datetime, timedelta, tzinfo
 from enum import Enum
 from tzlocal import get_localzone_name
 from dataclasses import dataclass
+from operator import attrgetter
+
+import numpy as np
 
 from vnpy.trader.object import (
     HistoryRequest,
@@ -27,6 +35,46 @@ EVENT_SPREAD_STRATEGY = "eSpreadStrategy"
 
 LOCAL_TZ = ZoneInfo(get_localzone_name())
 
+INFINITY: float = float("inf")
+
+# Columns of spread bar array for saving and sharing
+SPREAD_BAR_DTYPE: np.dtype = np.dtype([
+    ("datetime", "i8"),
+    ("open_price", "f8"),
+    ("high_price", "f8"),
+    ("low_price", "f8"),
+    ("close_price", "f8"),
+    ("volume", "f8"),
+    ("value", "f8"),
+])
+
+# Syntax and functions allowed in spread price formula
+FORMULA_NODES: tuple = (
+    ast.Expression,
+    ast.BinOp,
+    ast.UnaryOp,
+    ast.Call,
+    ast.Name,
+    ast.Load,
+    ast.Constant,
+    ast.Add,
+    ast.Sub,
+    ast.Mult,
+    ast.Div,
+    ast.FloorDiv,
+    ast.Mod,
+    ast.Pow,
+    ast.UAdd,
+    ast.USub,
+)
+FORMULA_FUNCTIONS: Dict[str, Callable] = {
+    "abs": abs,
+    "min": min,
+    "max": max,
+    "pow": pow,
+    "round": round,
+}
+
 
 class LegData:
     """"""
@@ -52,6 +100,7 @@ class LegData:
         self.tick: TickData = None
 
         # Contract data
+        self.contract: ContractData = None
         self.size: float = 0
         self.net_position: bool = False
         self.min_volume: float = 0
@@ -59,6 +108,7 @@ class LegData:
 
     def update_contract(self, contract: ContractData) -> None:
         """"""
+        self.contract = contract
         self.size = contract.size
         self.net_position = contract.net_position
         self.min_volume = contract.min_volume
@@ -198,6 +248,9 @@ class SpreadData:
 
         self.datetime: datetime = None
 
+        # Clock of calculate time, which can be replaced for replay
+        self.clock: Callable[[], datetime] = get_local_datetime
+
         self.leg_pos: defaultdict = defaultdict(int)
 
         # 价差计算公式相关
@@ -205,18 +258,99 @@ class SpreadData:
         self.variable_directions: dict = variable_directions
         self.price_formula = price_formula
 
-        # 实盘时编译公式，加速计算
-        if compile_formula:
-            self.price_code: str = compile(price_formula, __name__, "eval")
-        # 回测时不编译公式，从而支持多进程优化
-        else:
-            self.price_code: str = price_formula
-
         self.variable_legs: Dict[str, LegData] = {}
         for variable, vt_symbol in variable_symbols.items():
             leg: LegData = self.legs[vt_symbol]
             self.variable_legs[variable] = leg
 
+        # Compile price formula into function for fast calculation
+        self.price_code: str = ""
+        self.price_func: Callable = None
+        self.vectorized: bool = False
+
+        # Coefficients for linear price formula, empty for nonlinear formula
+        self.linear_coefficients: np.ndarray = None
+        self.linear_intercept: float = 0
+
+        # Leg, trading direction, trading multiplier and coefficient of each variable
+        self.price_params: List[tuple] = []
+        self.symbol_indexes: Dict[str, List[int]] = defaultdict(list)
+
+        # Cached price term and adjusted volume of each variable for incremental calculation
+        self.bid_terms: List[float] = []
+        self.ask_terms: List[float] = []
+        self.bid_volumes: List[float] = []
+        self.ask_volumes: List[float] = []
+        self.leg_ready: List[bool] = []
+        self.missing_count: int = 0
+
+        # Whether bid/ask price/volume changed in last calculation
+        self.quote_changed: bool = False
+
+        self.init_formula()
+
+    def __getstate__(self) -> dict:
+        """
+        Drop compiled formula objects which can not be pickled.
+        """
+        state: dict = self.__dict__.copy()
+        state["price_code"] = ""
+        state["price_func"] = None
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        """
+        Compile price formula again after unpickled in another process.
+        """
+        self.__dict__.update(state)
+        self.init_formula()
+
+    def init_formula(self) -> None:
+        """"""
+        self.price_func = compile_price_formula(
+            self.price_formula, list(self.variable_symbols.keys())
+        )
+
+        tree: ast.Expression = ast.parse(self.price_formula.strip(), mode="eval")
+        self.vectorized = not any(isinstance(node, ast.Call) for node in ast.walk(tree))
+
+        result: Optional[tuple] = parse_linear_formula(tree.body)
+        if result:
+            coefficients, self.linear_intercept = result
+            self.linear_coefficients = np.array(
+                [coefficients.get(variable, 0) for variable in self.variable_symbols],
+                dtype=float,
+            )
+        else:
+            self.linear_coefficients = None
+            self.linear_intercept = 0
+
+        self.price_params = []
+        for n, (variable, leg) in enumerate(self.variable_legs.items()):
+            if self.linear_coefficients is not None:
+                coefficient: float = float(self.linear_coefficients[n])
+            else:
+                coefficient: float = 0
+
+            self.price_params.append((
+                leg,
+                self.variable_directions[variable],
+                self.trading_multipliers[leg.vt_symbol],
+                coefficient,
+            ))
+
+        self.symbol_indexes = defaultdict(list)
+        for n, (leg, _, _, _) in enumerate(self.price_params):
+            self.symbol_indexes[leg.vt_symbol].append(n)
+
+        self.clear_cache()
+
+        # Code object is only kept for backward compatibility of parse_formula
+        if self.compile_formula:
+            self.price_code = compile(self.price_formula, __name__, "eval")
+        else:
+            self.price_code = self.price_formula
+
     def calculate_price(self) -> bool:
         """
         计算价差盘口
@@ -224,74 +358,193 @@ class SpreadData:
         1. 如果各条腿价格均有效，则计算成功，返回True
         2. 反之只要有一条腿的价格无效，则计算失败，返回False
         """
-        self.clear_price()
-
-        # Go through all legs to calculate price
-        bid_data: dict = {}
-        ask_data: dict = {}
-        volume_inited: bool = False
-
-        for variable, leg in self.variable_legs.items():
-            # Filter not all leg price data has been received
-            if not leg.bid_volume or not leg.ask_volume:
-                self.clear_price()
-                return False
-
-            # Generate price dict for calculating spread bid/ask
-            variable_direction: int = self.variable_directions[variable]
-            if variable_direction > 0:
-                bid_data[variable] = leg.bid_price
-                ask_data[variable] = leg.ask_price
-            else:
-                bid_data[variable] = leg.ask_price
-                ask_data[variable] = leg.bid_price
+        for n in range(len(self.price_params)):
+            self.update_cache(n)
 
-            # Calculate volume
-            trading_multiplier: int = self.trading_multipliers[leg.vt_symbol]
-            if not trading_multiplier:
-                continue
+        if self.missing_count:
+            self.clear_price()
+            return False
 
-            leg_bid_volume: float = leg.bid_volume
-            leg_ask_volume: float = leg.ask_volume
+        self.quote_changed = self.calculate_quote()
 
-            if trading_multiplier > 0:
-                adjusted_bid_volume: float = floor_to(
-                    leg_bid_volume / trading_multiplier, self.min_volume
-                )
-                adjusted_ask_volume: float = floor_to(
-                    leg_ask_volume / trading_multiplier, self.min_volume
-                )
-            else:
-                adjusted_bid_volume: float = floor_to(
-                    leg_ask_volume / abs(trading_multiplier), self.min_volume
-                )
-                adjusted_ask_volume: float = floor_to(
-                    leg_bid_volume / abs(trading_multiplier), self.min_volume
-                )
-
-            # For the first leg, just initialize
-            if not volume_inited:
-                self.bid_volume = adjusted_bid_volume
-                self.ask_volume = adjusted_ask_volume
-                volume_inited = True
-            # For following legs, use min value of each leg quoting volume
-            else:
-                self.bid_volume = min(self.bid_volume, adjusted_bid_volume)
-                self.ask_volume = min(self.ask_volume, adjusted_ask_volume)
+        # Update calculate time
+        self.datetime = self.clock()
+
+        return True
+
+    def calculate_leg_price(self, vt_symbol: str) -> bool:
+        """
+        Recalculate spread quote incrementally after tick of one leg updated.
+
+        Only the cached contribution of the leg is recomputed, the return
+        value is the same as calculate_price.
+        """
+        for n in self.symbol_indexes[vt_symbol]:
+            self.update_cache(n)
+
+        # Check other legs not ready, which may have received tick before
+        if self.missing_count:
+            for n, ready in enumerate(self.leg_ready):
+                if not ready:
+                    self.update_cache(n)
+
+        if self.missing_count:
+            self.clear_price()
+            return False
+
+        self.quote_changed = self.calculate_quote()
+
+        # Update calculate time
+        self.datetime = self.clock()
+
+        return True
+
+    def update_cache(self, n: int) -> None:
+        """
+        Update cached price term and adjusted volume of variable with index n.
+        """
+        leg, variable_direction, trading_multiplier, coefficient = self.price_params[n]
+
+        # Filter not all leg price data has been received
+        ready: bool = bool(leg.bid_volume and leg.ask_volume)
+        if ready != self.leg_ready[n]:
+            self.leg_ready[n] = ready
+            self.missing_count += -1 if ready else 1
+
+        if not ready:
+            return
+
+        # Select leg price for calculating spread bid/ask
+        if variable_direction > 0:
+            leg_bid_price: float = leg.bid_price
+            leg_ask_price: float = leg.ask_price
+        else:
+            leg_bid_price: float = leg.ask_price
+            leg_ask_price: float = leg.bid_price
 
+        # Linear formula is calculated as dot product of coefficients
+        if self.linear_coefficients is not None:
+            self.bid_terms[n] = coefficient * leg_bid_price
+            self.ask_terms[n] = coefficient * leg_ask_price
+        else:
+            self.bid_terms[n] = leg_bid_price
+            self.ask_terms[n] = leg_ask_price
+
+        # Calculate volume, non-trading leg is not restricted
+        if not trading_multiplier:
+            return
+
+        if trading_multiplier > 0:
+            self.bid_volumes[n] = floor_to(
+                leg.bid_volume / trading_multiplier, self.min_volume
+            )
+            self.ask_volumes[n] = floor_to(
+                leg.ask_volume / trading_multiplier, self.min_volume
+            )
+        else:
+            self.bid_volumes[n] = floor_to(
+                leg.ask_volume / abs(trading_multiplier), self.min_volume
+            )
+            self.ask_volumes[n] = floor_to(
+                leg.bid_volume / abs(trading_multiplier), self.min_volume
+            )
+
+    def calculate_quote(self) -> bool:
+        """
+        Calculate spread quote from cached data of all variables, return
+        True if any of bid/ask price/volume is changed.
+        """
         # Calculate spread price
-        self.bid_price = self.parse_formula(self.price_code, bid_data)
-        self.ask_price = self.parse_formula(self.price_code, ask_data)
+        if self.linear_coefficients is not None:
+            bid_price: float = self.linear_intercept + sum(self.bid_terms)
+            ask_price: float = self.linear_intercept + sum(self.ask_terms)
+        else:
+            bid_price: float = self.price_func(*self.bid_terms)
+            ask_price: float = self.price_func(*self.ask_terms)
 
         # Round price to pricetick
         if self.pricetick:
-            self.bid_price = round_to(self.bid_price, self.pricetick)
-            self.ask_price = round_to(self.ask_price, self.pricetick)
+            bid_price = round_to(bid_price, self.pricetick)
+            ask_price = round_to(ask_price, self.pricetick)
+
+        # Use min value of each leg quoting volume
+        bid_volume: float = min(self.bid_volumes)
+        ask_volume: float = min(self.ask_volumes)
+
+        if bid_volume == INFINITY:
+            bid_volume = 0
+            ask_volume = 0
+
+        if (
+            bid_price == self.bid_price
+            and ask_price == self.ask_price
+            and bid_volume == self.bid_volume
+            and ask_volume == self.ask_volume
+        ):
+            return False
+
+        self.bid_price = bid_price
+        self.ask_price = ask_price
+        self.bid_volume = bid_volume
+        self.ask_volume = ask_volume
+        return True
 
-        # Update calculate time
-        self.datetime = datetime.now(LOCAL_TZ)
+    def clear_cache(self) -> None:
+        """"""
+        count: int = len(self.price_params)
 
-        return True
+        self.bid_terms = [0.0] * count
+        self.ask_terms = [0.0] * count
+        self.bid_volumes = [INFINITY] * count
+        self.ask_volumes = [INFINITY] * count
+        self.leg_ready = [False] * count
+        self.missing_count = count
+
+    def calculate_price_array(self, prices: np.ndarray) -> np.ndarray:
+        """
+        Calculate spread price of whole history, each row of prices array
+        contains data of one variable.
+        """
+        if self.linear_coefficients is not None:
+            return self.linear_coefficients @ prices + self.linear_intercept
+        elif self.vectorized:
+            return np.asarray(self.price_func(*prices), dtype=float)
+        else:
+            return np.array([self.price_func(*column) for column in prices.T], dtype=float)
+
+    def calculate_price_range(
+        self, high_prices: np.ndarray, low_prices: np.ndarray
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Calculate high/low bounds of spread price with high/low prices of
+        each variable. Formula is evaluated at all corners of variable
+        ranges, which gives exact bounds if formula is monotonic in each
+        variable.
+        """
+        if self.linear_coefficients is not None:
+            positive: np.ndarray = (self.linear_coefficients >= 0)[:, None]
+            return (
+                self.calculate_price_array(np.where(positive, high_prices, low_prices)),
+                self.calculate_price_array(np.where(positive, low_prices, high_prices)),
+            )
+
+        spread_high: np.ndarray = None
+        spread_low: np.ndarray = None
+
+        for corner in product((True, False), repeat=len(high_prices)):
+            use_high: np.ndarray = np.array(corner)[:, None]
+            prices: np.ndarray = self.calculate_price_array(
+                np.where(use_high, high_prices, low_prices)
+            )
+
+            if spread_high is None:
+                spread_high = prices
+                spread_low = prices
+            else:
+                spread_high = np.maximum(spread_high, prices)
+                spread_low = np.minimum(spread_low, prices)
+
+        return spread_high, spread_low
 
     def update_trade(self, trade: TradeData) -> None:
         """Renewal of trade orders"""
@@ -404,6 +657,116 @@ class SpreadData:
         return item
 
 
+def get_local_datetime() -> datetime:
+    """Default clock of spread calculate time."""
+    return datetime.now(LOCAL_TZ)
+
+
+def compile_price_formula(price_formula: str, variables: List[str]) -> Callable:
+    """
+    Compile price formula into a function, which takes price of each variable
+    as positional argument in the same order of variables list.
+    """
+    tree: ast.Expression = ast.parse(price_formula.strip(), mode="eval")
+
+    # Validate syntax tree before compiling
+    for node in ast.walk(tree):
+        if not isinstance(node, FORMULA_NODES):
+            raise ValueError(f"Unsupported syntax in price formula: {price_formula}")
+
+        if isinstance(node, ast.Constant):
+            if not isinstance(node.value, (int, float)):
+                raise ValueError(f"Unsupported constant in price formula: {price_formula}")
+        elif isinstance(node, ast.Call):
+            if (
+                not isinstance(node.func, ast.Name)
+                or node.func.id not in FORMULA_FUNCTIONS
+                or node.keywords
+            ):
+                raise ValueError(f"Unsupported function in price formula: {price_formula}")
+        elif isinstance(node, ast.Name):
+            if node.id not in variables and node.id not in FORMULA_FUNCTIONS:
+                raise ValueError(f"Unknown variable {node.id} in price formula: {price_formula}")
+
+    # Generate lambda expression with variables as positional arguments
+    arguments: ast.arguments = ast.arguments(
+        posonlyargs=[],
+        args=[ast.arg(arg=variable) for variable in variables],
+        kwonlyargs=[],
+        kw_defaults=[],
+        defaults=[],
+    )
+    expression: ast.Expression = ast.Expression(
+        body=ast.Lambda(args=arguments, body=tree.body)
+    )
+    ast.fix_missing_locations(expression)
+
+    code = compile(expression, "<price_formula>", "eval")
+    price_func: Callable = eval(code, {"__builtins__": {}, **FORMULA_FUNCTIONS})
+    return price_func
+
+
+def parse_linear_formula(node: ast.AST) -> Optional[tuple]:
+    """
+    Parse coefficient of each variable and intercept from syntax tree of
+    price formula, return None if the formula is not linear.
+    """
+    if isinstance(node, ast.Constant):
+        return {}, float(node.value)
+    elif isinstance(node, ast.Name):
+        return {node.id: 1.0}, 0.0
+    elif isinstance(node, ast.UnaryOp):
+        result: Optional[tuple] = parse_linear_formula(node.operand)
+        if not result:
+            return None
+
+        coefficients, intercept = result
+        if isinstance(node.op, ast.USub):
+            coefficients = {k: -v for k, v in coefficients.items()}
+            intercept = -intercept
+        return coefficients, intercept
+    elif not isinstance(node, ast.BinOp):
+        return None
+
+    left: Optional[tuple] = parse_linear_formula(node.left)
+    right: Optional[tuple] = parse_linear_formula(node.right)
+    if not left or not right:
+        return None
+
+    left_coefficients, left_intercept = left
+    right_coefficients, right_intercept = right
+
+    if isinstance(node.op, (ast.Add, ast.Sub)):
+        sign: int = 1 if isinstance(node.op, ast.Add) else -1
+
+        coefficients: dict = dict(left_coefficients)
+        for variable, coefficient in right_coefficients.items():
+            coefficients[variable] = coefficients.get(variable, 0) + sign * coefficient
+
+        return coefficients, left_intercept + sign * right_intercept
+    # Multiply is linear only if one side is constant
+    elif isinstance(node.op, ast.Mult):
+        if not left_coefficients:
+            factor, coefficients, intercept = left_intercept, right_coefficients, right_intercept
+        elif not right_coefficients:
+            factor, coefficients, intercept = right_intercept, left_coefficients, left_intercept
+        else:
+            return None
+
+        return {k: v * factor for k, v in coefficients.items()}, intercept * factor
+    # Divide is linear only if divisor is non-zero constant
+    elif isinstance(node.op, ast.Div):
+        if right_coefficients or not right_intercept:
+            return None
+
+        return (
+            {k: v / right_intercept for k, v in left_coefficients.items()},
+            left_intercept / right_intercept
+        )
+
+    return None
+
+
 class EngineType(Enum):
     LIVE = "Live"
     BACKTESTING = "Backtesting"
@@ -412,6 +775,7 @@ class EngineType(Enum):
 class BacktestingMode(Enum):
     BAR = 1
     TICK = 2
+    LEG_TICK = 3
 
 
 def load_bar_data(
@@ -422,12 +786,21 @@ def load_bar_data(
     pricetick: float = 0,
     output: Callable = print,
     backtesting: bool = False,
-) -> List[BarData]:
-    """"""
+    ohlc: bool = False,
+) -> "SpreadBarSeries":
+    """
+    Load spread bars of whole history, leg bars are aligned by datetime
+    and spread price is calculated with arrays at once.
+
+    By default open/high/low of spread bar are the same as close. If ohlc
+    is True, open is calculated with leg opens, high/low are bounds of
+    spread price with leg highs/lows, and volume is calculated with leg
+    volumes and trading multipliers.
+    """
     database: BaseDatabase = get_database()
 
     # Load bar data of each spread leg
-    leg_bars: Dict[str, Dict] = {}
+    leg_bars: Dict[str, List[BarData]] = {}
 
     for vt_symbol in spread.legs.keys():
         symbol, exchange = extract_vt_symbol(vt_symbol)
@@ -445,51 +818,291 @@ def load_bar_data(
         if not bar_data:
             bar_data = database.load_bar_data(symbol, exchange, interval, start, end)
 
-        bars: Dict[datetime, BarData] = {bar.datetime: bar for bar in bar_data}
-        leg_bars[vt_symbol] = bars
+        leg_bars[vt_symbol] = bar_data
 
-    # Calculate spread bar data
-    spread_bars: List[BarData] = []
+    # Convert bars of each variable leg into arrays sorted by timestamp
+    if ohlc:
+        fields: List[str] = ["close_price", "open_price", "high_price", "low_price", "volume"]
+    else:
+        fields: List[str] = ["close_price"]
 
-    for dt in bars.keys():
-        spread_price = 0
-        spread_value = 0
-        spread_available: bool = True
+    leg_timestamps: List[np.ndarray] = []
+    leg_arrays: Dict[str, List[np.ndarray]] = {field: [] for field in fields}
+    datetimes: np.ndarray = None
 
-        leg_data: dict = {}
-        for variable, leg in spread.variable_legs.items():
-            leg_bar: Optional[BarData] = leg_bars[leg.vt_symbol].get(dt, None)
+    for leg in spread.variable_legs.values():
+        bars: List[BarData] = leg_bars[leg.vt_symbol]
 
-            if leg_bar:
-                # Cache the current price of the leg
-                leg_data[variable] = leg_bar.close_price
+        timestamps: np.ndarray = np.fromiter(
+            (bar.datetime.timestamp() for bar in bars), dtype=float, count=len(bars)
+        )
+        order: np.ndarray = np.argsort(timestamps, kind="stable")
+        leg_timestamps.append(timestamps[order])
 
-                # Cumulative value based on transaction multipliers
-                trading_multiplier: int = spread.trading_multipliers[leg.vt_symbol]
-                spread_value += trading_multiplier * leg_bar.close_price
-            else:
-                spread_available = False
-
-        if spread_available:
-            spread_price = spread.parse_formula(spread.price_code, leg_data)
-            if pricetick:
-                spread_price: float = round_to(spread_price, pricetick)
-
-            spread_bar: BarData = BarData(
-                symbol=spread.name,
-                exchange=exchange.LOCAL,
-                datetime=dt,
-                interval=interval,
-                open_price=spread_price,
-                high_price=spread_price,
-                low_price=spread_price,
-                close_price=spread_price,
-                gateway_name="SPREAD",
+        for field in fields:
+            get_value: Callable = attrgetter(field)
+            values: np.ndarray = np.fromiter(
+                (get_value(bar) for bar in bars), dtype=float, count=len(bars)
+            )
+            leg_arrays[field].append(values[order])
+
+        if datetimes is None:
+            datetimes = np.array([bar.datetime for bar in bars], dtype=object)[order]
+
+    if datetimes is None:
+        return SpreadBarSeries(spread.name, interval, [], np.empty(0), np.empty(0))
+
+    # Keep timestamps available for all legs
+    common: np.ndarray = leg_timestamps[0]
+    for timestamps in leg_timestamps[1:]:
+        common = np.intersect1d(common, timestamps)
+
+    indexes: List[np.ndarray] = [
+        np.searchsorted(timestamps, common) for timestamps in leg_timestamps
+    ]
+
+    # Each row of price array contains data of one leg, with the same memory
+    # layout as transposed price table for the same matrix product result
+    leg_prices: Dict[str, np.ndarray] = {}
+    for field in fields:
+        prices: np.ndarray = np.empty((len(common), len(indexes))).T
+        for n, (values, index) in enumerate(zip(leg_arrays[field], indexes)):
+            prices[n] = values[index]
+        leg_prices[field] = prices
+
+    # Calculate spread price and value of whole history at once
+    close_prices: np.ndarray = leg_prices["close_price"]
+    spread_prices: np.ndarray = spread.calculate_price_array(close_prices)
+
+    multipliers: np.ndarray = np.array([
+        spread.trading_multipliers[leg.vt_symbol]
+        for leg in spread.variable_legs.values()
+    ], dtype=float)
+    spread_values: np.ndarray = multipliers @ close_prices
+
+    spread_datetimes: List[datetime] = datetimes[indexes[0]].tolist()
+
+    if not ohlc:
+        if pricetick:
+            spread_prices = round_to_array(spread_prices, pricetick)
+
+        return SpreadBarSeries(
+            spread.name, interval, spread_datetimes, spread_prices, spread_values
+        )
+
+    open_prices: np.ndarray = spread.calculate_price_array(leg_prices["open_price"])
+    high_prices, low_prices = spread.calculate_price_range(
+        leg_prices["high_price"], leg_prices["low_price"]
+    )
+
+    # Make sure high/low contain open/close in case of invalid leg data
+    high_prices = np.maximum(high_prices, np.maximum(open_prices, spread_prices))
+    low_prices = np.minimum(low_prices, np.minimum(open_prices, spread_prices))
+
+    if pricetick:
+        spread_prices = round_to_array(spread_prices, pricetick)
+        open_prices = round_to_array(open_prices, pricetick)
+        high_prices = round_to_array(high_prices, pricetick)
+        low_prices = round_to_array(low_prices, pricetick)
+
+    # Spread volume is limited by the leg with least volume per trading unit
+    leg_volumes: np.ndarray = leg_prices["volume"]
+    traded_legs: np.ndarray = multipliers != 0
+    spread_volumes: np.ndarray = np.min(
+        leg_volumes[traded_legs] / np.abs(multipliers[traded_legs])[:, None],
+        axis=0,
+        initial=INFINITY,
+    )
+    spread_volumes[np.isinf(spread_volumes)] = 0
+
+    return SpreadBarSeries(
+        spread.name,
+        interval,
+        spread_datetimes,
+        spread_prices,
+        spread_values,
+        open_prices,
+        high_prices,
+        low_prices,
+        spread_volumes,
+    )
+
+
+def round_to_array(values: np.ndarray, target: float) -> np.ndarray:
+    """
+    Round array of prices to price tick value, prices close to half tick
+    are rounded with round_to so that results are the same.
+    """
+    digits: int = max(0, -Decimal(str(target)).as_tuple().exponent)
+
+    ticks: np.ndarray = values / target
+    rounded: np.ndarray = np.round(np.round(ticks) * target, digits)
+
+    half_ticks: np.ndarray = np.flatnonzero(np.abs(ticks - np.floor(ticks) - 0.5) < 1e-6)
+    for n in half_ticks.tolist():
+        rounded[n] = round_to(float(values[n]), target)
+
+    return rounded
+
+
+class SpreadBarSeries(Sequence):
+    """
+    Spread bars of whole history stored in arrays, BarData is created
+    only when accessed.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        interval: Interval,
+        datetimes: List[datetime],
+        close_prices: np.ndarray,
+        values: np.ndarray,
+        open_prices: np.ndarray = None,
+        high_prices: np.ndarray = None,
+        low_prices: np.ndarray = None,
+        volumes: np.ndarray = None,
+    ) -> None:
+        """"""
+        self.name: str = name
+        self.interval: Interval = interval
+
+        self.datetimes: List[datetime] = datetimes
+        self.close_prices: np.ndarray = close_prices
+        self.values: np.ndarray = values
+
+        # Open/high/low are the same as close if not provided
+        if open_prices is None:
+            open_prices = close_prices
+        if high_prices is None:
+            high_prices = close_prices
+        if low_prices is None:
+            low_prices = close_prices
+        if volumes is None:
+            volumes = np.zeros(len(close_prices))
+
+        self.open_prices: np.ndarray = open_prices
+        self.high_prices: np.ndarray = high_prices
+        self.low_prices: np.ndarray = low_prices
+        self.volumes: np.ndarray = volumes
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.datetimes)
+
+    def __getitem__(self, index: Any) -> Any:
+        """"""
+        if isinstance(index, slice):
+            return SpreadBarSeries(
+                self.name,
+                self.interval,
+                self.datetimes[index],
+                self.close_prices[index],
+                self.values[index],
+                self.open_prices[index],
+                self.high_prices[index],
+                self.low_prices[index],
+                self.volumes[index],
             )
-            spread_bar.value = spread_value
-            spread_bars.append(spread_bar)
 
-    return spread_bars
+        return self.create_bar(
+            self.datetimes[index],
+            float(self.open_prices[index]),
+            float(self.high_prices[index]),
+            float(self.low_prices[index]),
+            float(self.close_prices[index]),
+            float(self.volumes[index]),
+            float(self.values[index]),
+        )
+
+    def __iter__(self) -> Iterator[BarData]:
+        """"""
+        for args in zip(
+            self.datetimes,
+            self.open_prices.tolist(),
+            self.high_prices.tolist(),
+            self.low_prices.tolist(),
+            self.close_prices.tolist(),
+            self.volumes.tolist(),
+            self.values.tolist(),
+        ):
+            yield self.create_bar(*args)
+
+    def create_bar(
+        self,
+        dt: datetime,
+        open_price: float,
+        high_price: float,
+        low_price: float,
+        close_price: float,
+        volume: float,
+        value: float,
+    ) -> BarData:
+        """"""
+        bar: BarData = BarData(
+            symbol=self.name,
+            exchange=Exchange.LOCAL,
+            datetime=dt,
+            interval=self.interval,
+            volume=volume,
+            open_price=open_price,
+            high_price=high_price,
+            low_price=low_price,
+            close_price=close_price,
+            gateway_name="SPREAD",
+        )
+        bar.value = value
+        return bar
+
+    def to_array(self) -> np.ndarray:
+        """Convert into structured array with datetime in POSIX microseconds."""
+        data: np.ndarray = np.empty(len(self), dtype=SPREAD_BAR_DTYPE)
+        data["datetime"] = get_timestamps(self.datetimes)
+        data["open_price"] = self.open_prices
+        data["high_price"] = self.high_prices
+        data["low_price"] = self.low_prices
+        data["close_price"] = self.close_prices
+        data["volume"] = self.volumes
+        data["value"] = self.values
+        return data
+
+    @classmethod
+    def from_array(
+        cls, name: str, interval: Interval, data: np.ndarray, tz: Optional[tzinfo]
+    ) -> "SpreadBarSeries":
+        """Create from structured array converted by to_array."""
+        return cls(
+            name,
+            interval,
+            get_datetimes(data["datetime"], tz),
+            data["close_price"],
+            data["value"],
+            data["open_price"],
+            data["high_price"],
+            data["low_price"],
+            data["volume"],
+        )
+
+
+def get_timestamps(datetimes: List[datetime]) -> np.ndarray:
+    """Convert datetimes into POSIX timestamps in microseconds."""
+    return np.fromiter(
+        (round(dt.timestamp() * 1_000_000) for dt in datetimes),
+        dtype=np.int64,
+        count=len(datetimes),
+    )
+
+
+def get_datetimes(timestamps: np.ndarray, tz: Optional[tzinfo]) -> List[datetime]:
+    """Convert POSIX timestamps in microseconds into datetimes."""
+    datetimes: List[datetime] = []
+
+    for timestamp in timestamps.tolist():
+        seconds, microseconds = divmod(timestamp, 1_000_000)
+        dt: datetime = datetime.fromtimestamp(seconds, tz).replace(microsecond=microseconds)
+        datetimes.append(dt)
+
+    return datetimes
 
 
 def load_tick_data(
@@ -500,6 +1113,41 @@ def load_tick_data(
     return database.load_tick_data(spread.name, Exchange.LOCAL, start, end)
 
 
+def load_leg_tick_data(
+    spread: SpreadData, start: datetime, end: datetime, chunk_days: int = 1
+) -> Iterator[TickData]:
+    """
+    Load tick data of all legs merged in time order, ticks of each leg are
+    loaded from database chunk by chunk while iterating.
+    """
+    streams: List[Iterator[TickData]] = [
+        load_leg_tick_stream(vt_symbol, start, end, chunk_days)
+        for vt_symbol in spread.legs.keys()
+    ]
+    return heapq.merge(*streams, key=attrgetter("datetime"))
+
+
+def load_leg_tick_stream(
+    vt_symbol: str, start: datetime, end: datetime, chunk_days: int
+) -> Iterator[TickData]:
+    """"""
+    database: BaseDatabase = get_database()
+    symbol, exchange = extract_vt_symbol(vt_symbol)
+
+    chunk_start: datetime = start
+    while chunk_start <= end:
+        # Database query includes both start and end, so chunks must not overlap
+        chunk_end: datetime = chunk_start + timedelta(days=chunk_days)
+        query_end: datetime = min(chunk_end - timedelta(microseconds=1), end)
+
+        ticks: List[TickData] = database.load_tick_data(
+            symbol, exchange, chunk_start, query_end
+        )
+        yield from ticks
+
+        chunk_start = chunk_end
+
+
 def query_bar_from_datafeed(
     symbol: str,
     exchange: Exchange,
@@ -0,0 +1,333 @@
+import hashlib
+import json
+import os
+import traceback
+from datetime import datetime, tzinfo
+from pathlib import Path
+from threading import Lock
+from time import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Interval
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.utility import get_folder_path, ZoneInfo
+
+from .base import (
+    SpreadData,
+    SpreadBarSeries,
+    SPREAD_BAR_DTYPE,
+    load_bar_data,
+    get_datetimes,
+)
+from .utility import FileLock, save_json_file
+
+
+class SpreadBarCache:
+    """
+    On-disk cache of spread bars calculated by load_bar_data.
+
+    Bars of each spread definition are saved into one numpy file, keyed by
+    hash of leg symbols, price formula, trading multipliers, interval,
+    pricetick and ohlc option. Only time ranges not covered by the cache
+    are calculated, and least recently used files are removed when total
+    size exceeds disk budget.
+
+    Cache folder may be shared by several processes (e.g. optimization
+    workers), so index is reloaded and updated under a file lock.
+    """
+
+    # Disk budget in bytes of all cached spread bars
+    budget: int = 1 << 30
+
+    def __init__(self, folder_name: str = "spread_bar_cache", output: Callable = print) -> None:
+        """"""
+        self.folder_path: Path = get_folder_path(folder_name)
+        self.index_path: Path = self.folder_path.joinpath("index.json")
+        self.lock_path: Path = self.folder_path.joinpath("index.lock")
+        self.output: Callable = output
+
+        self.lock: Lock = Lock()
+        self.index: Dict[str, dict] = {}
+
+    def get_key(
+        self, spread: SpreadData, interval: Interval, pricetick: float, ohlc: bool
+    ) -> str:
+        """Get hash of spread definition and bar options."""
+        definition: dict = {
+            "variable_symbols": spread.variable_symbols,
+            "price_formula": spread.price_formula,
+            "trading_multipliers": spread.trading_multipliers,
+            "interval": Interval(interval).value,
+            "pricetick": pricetick,
+            "ohlc": ohlc,
+        }
+        text: str = json.dumps(definition, sort_keys=True)
+        return hashlib.sha1(text.encode("UTF-8")).hexdigest()
+
+    def load_bar_data(
+        self,
+        spread: SpreadData,
+        interval: Interval,
+        start: datetime,
+        end: datetime,
+        pricetick: float = 0,
+        output: Callable = print,
+        backtesting: bool = False,
+        ohlc: bool = False,
+    ) -> SpreadBarSeries:
+        """
+        Load spread bars with the same arguments as load_bar_data, only
+        time ranges not cached before are calculated.
+        """
+        key: str = self.get_key(spread, interval, pricetick, ohlc)
+        data, ranges, tz = self.load_entry(key)
+
+        start_timestamp: int = get_timestamp(start)
+        end_timestamp: int = get_timestamp(end)
+        now_timestamp: int = get_timestamp(datetime.now(DB_TZ))
+
+        # Missing ranges are calculated without lock, so that slow database
+        # query does not block loading of other spreads and processes
+        new_ranges: List[list] = []
+        new_datas: List[np.ndarray] = []
+
+        for range_start, range_end in get_missing_ranges(ranges, start_timestamp, end_timestamp):
+            bars: SpreadBarSeries = load_bar_data(
+                spread,
+                interval,
+                get_datetime(range_start),
+                get_datetime(range_end),
+                pricetick,
+                output,
+                backtesting,
+                ohlc,
+            )
+
+            # Data of past range is complete for backtesting, so range
+            # without any bar (e.g. holidays) is also cached
+            completed: bool = backtesting and range_end < now_timestamp
+
+            if not len(bars):
+                if completed:
+                    new_ranges.append([range_start, range_end])
+                continue
+
+            new_data: np.ndarray = bars.to_array()
+            new_datas.append(new_data)
+            tz = bars.datetimes[0].tzinfo
+
+            if completed:
+                covered_end: int = range_end
+            else:
+                # Range after the last bar is not cached since data may be
+                # updated later, and the last bar may be unfinished in live
+                last_timestamp: int = int(new_data["datetime"][-1])
+                if not backtesting:
+                    last_timestamp -= 1
+
+                covered_end: int = min(range_end, last_timestamp)
+
+            if covered_end >= range_start:
+                new_ranges.append([range_start, covered_end])
+
+        # Merge into the latest cache, which may be updated by other processes
+        with self.lock, FileLock(self.lock_path):
+            self.index = self.load_index()
+            entry: Optional[dict] = self.index.get(key, None)
+
+            # Cache file is saved again only if new bars calculated
+            if entry and new_datas:
+                latest_data: Optional[np.ndarray] = self.load_file(key)
+                if latest_data is not None:
+                    data = latest_data
+                    ranges = entry["ranges"]
+                else:
+                    entry = None
+            elif entry:
+                ranges = entry["ranges"]
+
+            for new_data in new_datas:
+                data = merge_data(data, new_data)
+
+            for range_start, range_end in new_ranges:
+                ranges = add_range(ranges, range_start, range_end)
+
+            save_required: bool = bool(new_datas) or not entry
+
+            entry = {
+                "ranges": ranges,
+                "tz": str(tz) if tz else "",
+                "size": entry["size"] if entry else 0,
+                "access": time(),
+            }
+            self.index[key] = entry
+
+            if save_required:
+                entry["size"] = self.save_file(key, data)
+                self.evict(key)
+
+            self.save_index()
+
+        left: int = np.searchsorted(data["datetime"], start_timestamp, side="left")
+        right: int = np.searchsorted(data["datetime"], end_timestamp, side="right")
+
+        return SpreadBarSeries.from_array(spread.name, interval, data[left:right], tz)
+
+    def load_entry(self, key: str) -> Tuple[np.ndarray, List[list], Optional[tzinfo]]:
+        """Load cached bars, covered ranges and timezone of key."""
+        with self.lock, FileLock(self.lock_path):
+            self.index = self.load_index()
+
+            entry: Optional[dict] = self.index.get(key, None)
+            if entry:
+                data: Optional[np.ndarray] = self.load_file(key)
+
+                if data is not None:
+                    return data, entry["ranges"], get_tz(entry["tz"])
+
+                # Entry of failed file is removed by load_file
+                self.save_index()
+
+        # Calculate the whole range if cache file missing or corrupted
+        return np.empty(0, dtype=SPREAD_BAR_DTYPE), [], DB_TZ
+
+    def load_file(self, key: str) -> Optional[np.ndarray]:
+        """Load cached bars, return None if failed."""
+        file_path: Path = self.folder_path.joinpath(f"{key}.npy")
+
+        try:
+            return np.load(file_path)
+        except Exception:
+            self.output(f"Failed to load spread bar cache {file_path.name}:\n{traceback.format_exc()}")
+            self.index.pop(key, None)
+            return None
+
+    def save_file(self, key: str, data: np.ndarray) -> int:
+        """Save data by writing temp file and then replacing, return file size."""
+        file_path: Path = self.folder_path.joinpath(f"{key}.npy")
+        temp_path: Path = file_path.with_name(file_path.name + ".tmp")
+
+        with open(temp_path, mode="wb") as f:
+            np.save(f, data)
+
+        os.replace(temp_path, file_path)
+        return file_path.stat().st_size
+
+    def load_index(self) -> Dict[str, dict]:
+        """Load index saved by all processes, return empty index if failed."""
+        if not self.index_path.exists():
+            return {}
+
+        try:
+            with open(self.index_path, mode="r", encoding="UTF-8") as f:
+                return json.load(f)
+        except Exception:
+            self.output(f"Failed to load spread bar cache index:\n{traceback.format_exc()}")
+            return {}
+
+    def save_index(self) -> None:
+        """"""
+        save_json_file(self.index_path, self.index, fsync=False)
+
+    def evict(self, keep: str) -> None:
+        """Remove least recently used files until total size within budget."""
+        total: int = sum(entry["size"] for entry in self.index.values())
+
+        for key in sorted(self.index, key=lambda k: self.index[k]["access"]):
+            if total <= self.budget:
+                break
+
+            if key == keep:
+                continue
+
+            total -= self.index.pop(key)["size"]
+            self.folder_path.joinpath(f"{key}.npy").unlink(missing_ok=True)
+
+    def clear(self) -> None:
+        """Remove all cached files."""
+        with self.lock, FileLock(self.lock_path):
+            self.index = self.load_index()
+
+            for key in self.index:
+                self.folder_path.joinpath(f"{key}.npy").unlink(missing_ok=True)
+
+            self.index.clear()
+            self.save_index()
+
+
+bar_cache: SpreadBarCache = None
+
+
+def get_bar_cache() -> SpreadBarCache:
+    """Get spread bar cache shared in current process."""
+    global bar_cache
+
+    if not bar_cache:
+        bar_cache = SpreadBarCache()
+
+    return bar_cache
+
+
+def get_timestamp(dt: datetime) -> int:
+    """Get POSIX timestamp in microseconds, naive datetime is in database timezone."""
+    if not dt.tzinfo:
+        dt = dt.replace(tzinfo=DB_TZ)
+    return round(dt.timestamp() * 1_000_000)
+
+
+def get_datetime(timestamp: int) -> datetime:
+    """"""
+    return get_datetimes(np.array([timestamp]), DB_TZ)[0]
+
+
+def get_tz(name: str) -> Optional[tzinfo]:
+    """"""
+    if not name:
+        return None
+
+    try:
+        return ZoneInfo(name)
+    except Exception:
+        return DB_TZ
+
+
+def get_missing_ranges(ranges: List[list], start: int, end: int) -> List[list]:
+    """Get parts of [start, end] not covered by sorted ranges."""
+    missing: List[list] = []
+
+    for range_start, range_end in ranges:
+        if range_end < start:
+            continue
+        if range_start > end:
+            break
+
+        if range_start > start:
+            missing.append([start, range_start])
+        start = max(start, range_end)
+
+    if start < end:
+        missing.append([start, end])
+
+    return missing
+
+
+def add_range(ranges: List[list], start: int, end: int) -> List[list]:
+    """Add range and merge overlapping ones."""
+    merged: List[list] = []
+
+    for range_start, range_end in sorted(ranges + [[start, end]]):
+        if merged and range_start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], range_end)
+        else:
+            merged.append([range_start, range_end])
+
+    return merged
+
+
+def merge_data(data: np.ndarray, new_data: np.ndarray) -> np.ndarray:
+    """Merge bars sorted by datetime, new bars replace old ones of the same datetime."""
+    old_data: np.ndarray = data[~np.isin(data["datetime"], new_data["datetime"])]
+    merged: np.ndarray = np.concatenate([old_data, new_data])
+    return merged[np.argsort(merged["datetime"], kind="stable")]
@@ -1,12 +1,15 @@
 import traceback
+from logging import INFO
 import importlib
 import os
+from threading import Thread, Lock, Event as ThreadEvent
 from types import ModuleType
-from typing import List, Dict, Set, Callable, Any, Optional
-from collections import defaultdict
-from copy import copy
+from typing import List, Dict, Deque, Tuple, Callable, Any, Optional, Sequence
+from collections import defaultdict, deque
+from heapq import heappush, heappop
 from pathlib import Path
 from datetime import datetime, timedelta
+from time import perf_counter_ns
 
 from vnpy.event import EventEngine, Event
 from vnpy.trader.engine import BaseEngine, MainEngine
@@ -47,20 +50,67 @@ from .base import (
 )
 from .template import SpreadAlgoTemplate, SpreadStrategyTemplate
 from .algo import SpreadTakerAlgo
+from .utility import LatencyMonitor, TradeJournal, TradeIdFilter, LogFileSink
+from .recorder import SpreadRecorder
+from .cache import get_bar_cache
 
 
 APP_NAME = "SpreadTrading"
 
+# Internal event for pushing buffered GUI events on event engine thread
+EVENT_SPREAD_FLUSH = "eSpreadFlush"
+
 
 class SpreadEngine(BaseEngine):
     """"""
 
+    # Frequency (times per second) of pushing GUI events, 0 for pushing immediately
+    event_frequency: int = 4
+
+    # Whether to record latency of each stage from tick to order
+    latency_active: bool = True
+    latency_filename: str = "spread_trading_latency.json"
+
+    # Number of the latest trade ids kept for filtering duplicate trade push
+    tradeid_window: int = 100000
+
+    # Seconds to keep finished algos and orders for late order and trade push
+    retire_delay: int = 60
+
+    # Whether to write logs into file in log folder
+    log_file: bool = False
+
+    # Whether to record leg ticks, spread quotes, algo orders and trades
+    record_active: bool = False
+
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine) -> None:
         """Constructor"""
         super().__init__(main_engine, event_engine, APP_NAME)
 
         self.active: bool = False
 
+        # Leg, spreads and algos to update for tick of each vt_symbol
+        self.tick_dispatch: Dict[str, tuple] = {}
+
+        # Latency histograms of each stage from tick to order
+        self.latency_monitor: LatencyMonitor = LatencyMonitor(self.latency_active)
+
+        # Trade ids shared by all sub engines, each trade is processed only once
+        self.tradeid_filter: TradeIdFilter = TradeIdFilter(self.tradeid_window)
+
+        # Finished algos and orders are removed from all maps after retire delay
+        self.lifecycle: SpreadLifecycleManager = SpreadLifecycleManager(
+            self, self.retire_delay
+        )
+
+        self.publisher: SpreadEventPublisher = SpreadEventPublisher(
+            event_engine, self.event_frequency
+        )
+        self.put_gui_event = self.publisher.put
+
+        self.log_sink: LogFileSink = LogFileSink("spread_trading")
+        self.recorder: SpreadRecorder = SpreadRecorder(output=self.write_log)
+
         self.init_data_engine()
         self.init_algo_engine()
         self.init_strategy_engine()
@@ -73,6 +123,8 @@ class SpreadEngine(BaseEngine):
         self.remove_spread = self.data_engine.remove_spread
         self.get_spread = self.data_engine.get_spread
         self.get_all_spread_names = self.data_engine.get_all_spread_names
+        self.set_suppress_duplicate = self.data_engine.set_suppress_duplicate
+        self.get_data_statistics = self.data_engine.get_data_statistics
 
     def init_algo_engine(self) -> None:
         """Initializing the algorithmic engine"""
@@ -108,22 +160,190 @@ class SpreadEngine(BaseEngine):
             return
         self.active = True
 
+        self.publisher.start()
+
+        if self.log_file:
+            self.log_sink.start()
+
+        if self.record_active:
+            self.recorder.start()
+
         self.data_engine.start()
         self.algo_engine.start()
         self.strategy_engine.start()
 
+        self.register_event()
+
     def stop(self) -> None:
         """"""
         self.data_engine.stop()
         self.algo_engine.stop()
-        self.strategy_engine.stop()
+        self.strategy_engine.close()
+
+        self.publisher.stop()
+        self.log_sink.stop()
+        self.recorder.stop()
+
+    def close(self) -> None:
+        """Make sure spread trades, logs and records are written before exit."""
+        self.data_engine.pos_journal.stop()
+        self.log_sink.stop()
+        self.recorder.stop()
+
+    def register_event(self) -> None:
+        """"""
+        self.event_engine.register(EVENT_TICK, self.process_tick_event)
+        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
+        self.event_engine.register(EVENT_TIMER, self.lifecycle.process_timer_event)
+
+    def process_tick_event(self, event: Event) -> None:
+        """
+        Process leg tick in one pass: update leg data, recalculate spreads,
+        drive algos and then call back strategies.
+        """
+        tick: TickData = event.data
+
+        dispatch: Optional[tuple] = self.tick_dispatch.get(tick.vt_symbol, None)
+        if not dispatch:
+            dispatch = self.get_tick_dispatch(tick.vt_symbol)
+            if not dispatch:
+                return
+        leg, spreads, algos = dispatch
+
+        recorder: SpreadRecorder = self.recorder
+        if recorder.active:
+            recorder.record_tick(tick)
+
+        monitor: LatencyMonitor = self.latency_monitor
+        if not monitor.active:
+            leg.update_tick(tick)
+
+            updated_spreads: List[SpreadData] = self.data_engine.calculate_spreads(
+                tick.vt_symbol, spreads
+            )
+
+            if algos:
+                self.algo_engine.update_tick(tick, algos)
+
+            for spread in updated_spreads:
+                self.data_engine.put_data_event(spread)
+
+            if recorder.active:
+                for spread in updated_spreads:
+                    recorder.record_spread(spread)
+            return
+
+        t0: int = perf_counter_ns()
+        monitor.tick_time = t0
+        leg.update_tick(tick)
+
+        t1: int = perf_counter_ns()
+        updated_spreads: List[SpreadData] = self.data_engine.calculate_spreads(
+            tick.vt_symbol, spreads
+        )
+
+        t2: int = perf_counter_ns()
+        if algos:
+            self.algo_engine.update_tick(tick, algos)
+
+        t3: int = perf_counter_ns()
+        for spread in updated_spreads:
+            self.data_engine.put_data_event(spread)
+
+        t4: int = perf_counter_ns()
+        monitor.tick_time = 0
+
+        if recorder.active:
+            for spread in updated_spreads:
+                recorder.record_spread(spread)
+
+        monitor.record("tick", t1 - t0)
+        monitor.record("calculate_price", t2 - t1)
+        if algos:
+            monitor.record("algo_on_tick", t3 - t2)
+        if updated_spreads:
+            monitor.record("strategy", t4 - t3)
+        monitor.record("total", t4 - t0)
+
+    def process_trade_event(self, event: Event) -> None:
+        """
+        Filter duplicate trade push, then update spread position, algo
+        and strategy in order.
+        """
+        trade: TradeData = event.data
+
+        if not self.tradeid_filter.add(trade.vt_tradeid):
+            return
+
+        self.data_engine.update_trade(trade)
+        self.algo_engine.update_trade(trade)
+        self.strategy_engine.update_trade(trade)
+
+    def get_tradeid_statistics(self) -> dict:
+        """Get count and memory usage of trade ids kept for filtering."""
+        return self.tradeid_filter.get_statistics()
+
+    def get_lifecycle_statistics(self) -> Dict[str, int]:
+        """Get count of live, finished and retired algos and orders."""
+        return self.lifecycle.get_statistics()
+
+    def get_tick_dispatch(self, vt_symbol: str) -> Optional[tuple]:
+        """Generate dispatch lists for tick of the vt_symbol."""
+        leg: Optional[LegData] = self.data_engine.legs.get(vt_symbol, None)
+        if not leg:
+            return None
+
+        # Lists are updated in place by sub engines, so they can be cached here
+        dispatch: tuple = (
+            leg,
+            self.data_engine.symbol_spread_map[vt_symbol],
+            self.algo_engine.symbol_algo_map[vt_symbol],
+        )
+        self.tick_dispatch[vt_symbol] = dispatch
+        return dispatch
+
+    def set_latency_active(self, active: bool) -> None:
+        """Enable or disable latency recording completely."""
+        self.latency_monitor.active = active
+
+    def get_latency_statistics(self) -> Dict[str, dict]:
+        """Get latency statistics (in microseconds) of each stage from tick to order."""
+        return self.latency_monitor.get_statistics()
 
-    def write_log(self, msg: str) -> None:
+    def clear_latency(self) -> None:
         """"""
-        log: LegData = LogData(msg=msg, gateway_name=APP_NAME)
+        self.latency_monitor.clear()
+
+    def dump_latency(self, filename: str = "") -> None:
+        """Save latency statistics into json file."""
+        if not filename:
+            filename = self.latency_filename
+
+        save_json(filename, self.get_latency_statistics())
+
+    def write_log(self, msg: str, level: int = INFO) -> None:
+        """"""
+        log: LogData = LogData(msg=msg, gateway_name=APP_NAME, level=level)
         event: Event = Event(EVENT_SPREAD_LOG, log)
         self.event_engine.put(event)
 
+        if self.log_sink.active:
+            self.log_sink.write(log)
+
+    def set_algo_log_level(self, algoid: str, level: int) -> None:
+        """"""
+        algo: Optional[SpreadAlgoTemplate] = self.algo_engine.algos.get(algoid, None)
+        if algo:
+            algo.log_level = level
+
+    def set_strategy_log_level(self, strategy_name: str, level: int) -> None:
+        """"""
+        strategy: Optional[SpreadStrategyTemplate] = self.strategy_engine.strategies.get(
+            strategy_name, None
+        )
+        if strategy:
+            strategy.log_level = level
+
     def update_spread_data(self, spread: SpreadData) -> None:
         """"""
         self.algo_engine.update_spread_data(spread)
@@ -143,6 +363,17 @@ class SpreadDataEngine:
 
     setting_filename: str = "spread_trading_setting.json"
     pos_filename: str = "spread_trading_pos.json"
+    journal_filename: str = "spread_trading_pos.journal"
+
+    # Recalculate only contribution of the ticking leg
+    incremental: bool = True
+
+    # Default setting of pushing spread data only when quote changed
+    suppress_duplicate: bool = False
+
+    # Number of journal records to compact into snapshot, and whether to fsync after writing
+    pos_compact_count: int = 1000
+    pos_fsync: bool = True
 
     def __init__(self, spread_engine: SpreadEngine) -> None:
         """"""
@@ -157,7 +388,21 @@ class SpreadDataEngine:
         self.symbol_spread_map: Dict[str, List[SpreadData]] = defaultdict(list)
         self.order_spread_map: Dict[str, SpreadData] = {}
 
-        self.tradeid_history: Set[str] = set()
+        # Spread trades appended to journal, compacted into position snapshot
+        self.pos_seq: int = 0
+        self.journal_count: int = 0
+        self.pos_tradeids: Deque[str] = deque(maxlen=spread_engine.tradeid_window)
+        self.pos_journal: TradeJournal = TradeJournal(
+            self.journal_filename,
+            self.pos_filename,
+            self.pos_fsync,
+            self.write_log,
+        )
+
+        # Duplicate spread data suppression setting and statistics
+        self.suppress_settings: Dict[str, bool] = {}
+        self.pushed_counts: Dict[str, int] = defaultdict(int)
+        self.suppressed_counts: Dict[str, int] = defaultdict(int)
 
     def start(self) -> None:
         """"""
@@ -165,11 +410,13 @@ class SpreadDataEngine:
         self.load_pos()
         self.register_event()
 
+        self.pos_journal.start()
+
         self.write_log("Spread data engine started successfully.")
 
     def stop(self) -> None:
         """"""
-        pass
+        self.pos_journal.stop()
 
     def load_setting(self) -> None:
         """"""
@@ -183,6 +430,9 @@ class SpreadDataEngine:
                 spread_setting["active_symbol"],
                 spread_setting.get("min_volume", 1),
                 save=False,
+                suppress_duplicate=spread_setting.get(
+                    "suppress_duplicate", self.suppress_duplicate
+                ),
             )
 
     def save_setting(self) -> None:
@@ -209,6 +459,7 @@ class SpreadDataEngine:
                 "price_formula": spread.price_formula,
                 "active_symbol": spread.active_leg.vt_symbol,
                 "min_volume": spread.min_volume,
+                "suppress_duplicate": self.suppress_settings[spread.name],
             }
 
             setting.append(spread_setting)
@@ -216,43 +467,113 @@ class SpreadDataEngine:
         save_json(self.setting_filename, setting)
 
     def save_pos(self) -> None:
-        """Save of spread positions"""
-        pos_data: dict = {}
+        """
+        Save snapshot of all spread positions, and clear trade records
+        in journal.
+        """
+        snapshot: dict = {
+            "seq": self.pos_seq,
+            "pos": {
+                name: dict(spread.leg_pos)
+                for name, spread in self.spreads.items()
+            },
+            "tradeids": list(self.pos_tradeids),
+        }
+        self.pos_journal.compact(snapshot)
 
-        for spread in self.spreads.values():
-            pos_data[spread.name] = spread.leg_pos
+        self.journal_count = 0
 
-        save_json(self.pos_filename, pos_data)
+    def append_trade(self, spread: SpreadData, trade: TradeData) -> None:
+        """Append spread trade into journal, compact if too many records."""
+        if trade.direction == Direction.LONG:
+            volume: float = trade.volume
+        else:
+            volume: float = -trade.volume
+
+        self.pos_seq += 1
+        self.pos_tradeids.append(trade.vt_tradeid)
+
+        record: dict = {
+            "seq": self.pos_seq,
+            "vt_tradeid": trade.vt_tradeid,
+            "spread": spread.name,
+            "vt_symbol": trade.vt_symbol,
+            "volume": volume,
+        }
+        self.pos_journal.append(record)
+
+        self.journal_count += 1
+        if self.journal_count >= self.pos_compact_count:
+            self.save_pos()
 
     def load_pos(self) -> None:
-        """Load spread positions"""
-        pos_data: dict = load_json(self.pos_filename)
+        """
+        Load spread positions from snapshot, and then replay trades
+        recorded in journal after the snapshot.
+        """
+        data: dict = load_json(self.pos_filename)
+
+        # Position file of old version contains only leg positions of each spread
+        if isinstance(data.get("seq", None), int):
+            pos_data: dict = data["pos"]
+            self.pos_seq = data["seq"]
+            self.pos_tradeids.extend(data.get("tradeids", []))
+        else:
+            pos_data: dict = data
 
         for name, leg_pos in pos_data.items():
             spread: SpreadData = self.spreads.get(name, None)
             if spread:
                 spread.leg_pos.update(leg_pos)
 
+        for record in self.pos_journal.load():
+            if record["seq"] <= self.pos_seq:
+                continue
+            self.pos_seq = record["seq"]
+            self.pos_tradeids.append(record["vt_tradeid"])
+            self.journal_count += 1
+
+            spread: SpreadData = self.spreads.get(record["spread"], None)
+            if spread:
+                spread.leg_pos[record["vt_symbol"]] += record["volume"]
+
+        # Rebuild trade id filter to filter trades pushed again after restart
+        for vt_tradeid in self.pos_tradeids:
+            self.spread_engine.tradeid_filter.add(vt_tradeid)
+
     def register_event(self) -> None:
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
-        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
 
-    def process_tick_event(self, event: Event) -> None:
-        """"""
-        tick: TickData = event.data
+    def calculate_spreads(
+        self, vt_symbol: str, spreads: List[SpreadData]
+    ) -> List[SpreadData]:
+        """
+        Recalculate spreads after leg tick updated, return spreads whose
+        data needs to be pushed.
+        """
+        updated_spreads: List[SpreadData] = []
 
-        leg: LegData = self.legs.get(tick.vt_symbol, None)
-        if not leg:
-            return
-        leg.update_tick(tick)
+        for spread in spreads:
+            if self.incremental:
+                calculated: bool = spread.calculate_leg_price(vt_symbol)
+            else:
+                calculated: bool = spread.calculate_price()
 
-        for spread in self.symbol_spread_map[tick.vt_symbol]:
             # Send events only if a spread can be successfully calculated
-            if spread.calculate_price():
-                self.put_data_event(spread)
+            if not calculated:
+                continue
+
+            # Filter spread data with top-of-book unchanged
+            if not spread.quote_changed and self.suppress_settings[spread.name]:
+                self.suppressed_counts[spread.name] += 1
+                continue
+
+            self.pushed_counts[spread.name] += 1
+            updated_spreads.append(spread)
+
+        return updated_spreads
 
     def process_position_event(self, event: Event) -> None:
         """"""
@@ -267,14 +588,8 @@ class SpreadDataEngine:
             spread.calculate_pos()
             self.put_pos_event(spread)
 
-    def process_trade_event(self, event: Event) -> None:
+    def update_trade(self, trade: TradeData) -> None:
         """"""
-        trade: TradeData = event.data
-
-        if trade.vt_tradeid in self.tradeid_history:
-            return
-        self.tradeid_history.add(trade.vt_tradeid)
-
         # Query the trade, the corresponding spread, and update the calculated spread position.
         spread: SpreadData = self.order_spread_map.get(trade.vt_orderid, None)
         if spread:
@@ -282,7 +597,7 @@ class SpreadDataEngine:
             spread.calculate_pos()
             self.put_pos_event(spread)
 
-            self.save_pos()
+            self.append_trade(spread, trade)
 
     def process_contract_event(self, event: Event) -> None:
         """"""
@@ -299,16 +614,12 @@ class SpreadDataEngine:
     def put_data_event(self, spread: SpreadData) -> None:
         """"""
         self.spread_engine.update_spread_data(spread)
-
-        event: Event = Event(EVENT_SPREAD_DATA, spread.get_item())
-        self.event_engine.put(event)
+        self.spread_engine.put_gui_event(EVENT_SPREAD_DATA, spread.name, spread.get_item)
 
     def put_pos_event(self, spread: SpreadData) -> None:
         """"""
         self.spread_engine.update_spread_pos(spread)
-
-        event: Event = Event(EVENT_SPREAD_POS, spread.get_item())
-        self.event_engine.put(event)
+        self.spread_engine.put_gui_event(EVENT_SPREAD_POS, spread.name, spread.get_item)
 
     def get_leg(self, vt_symbol: str) -> LegData:
         """"""
@@ -344,6 +655,7 @@ class SpreadDataEngine:
         active_symbol: str,
         min_volume: float,
         save: bool = True,
+        suppress_duplicate: bool = None,
     ) -> None:
         """"""
         if name in self.spreads:
@@ -377,6 +689,10 @@ class SpreadDataEngine:
         )
         self.spreads[name] = spread
 
+        if suppress_duplicate is None:
+            suppress_duplicate = self.suppress_duplicate
+        self.suppress_settings[name] = suppress_duplicate
+
         for leg in spread.legs.values():
             self.symbol_spread_map[leg.vt_symbol].append(spread)
 
@@ -392,6 +708,9 @@ class SpreadDataEngine:
             return
 
         spread: SpreadData = self.spreads.pop(name)
+        self.suppress_settings.pop(name)
+        self.pushed_counts.pop(name, None)
+        self.suppressed_counts.pop(name, None)
 
         for leg in spread.legs.values():
             self.symbol_spread_map[leg.vt_symbol].remove(spread)
@@ -406,6 +725,27 @@ class SpreadDataEngine:
         spread: SpreadData = self.spreads.get(name, None)
         return spread
 
+    def set_suppress_duplicate(self, name: str, suppress_duplicate: bool) -> None:
+        """Set whether to push spread data only when quote changed."""
+        if name not in self.spreads:
+            return
+
+        self.suppress_settings[name] = suppress_duplicate
+        self.save_setting()
+
+    def get_data_statistics(self) -> Dict[str, dict]:
+        """Get count of pushed and suppressed spread data of each spread."""
+        statistics: Dict[str, dict] = {}
+
+        for name in self.spreads.keys():
+            statistics[name] = {
+                "suppress_duplicate": self.suppress_settings[name],
+                "pushed": self.pushed_counts[name],
+                "suppressed": self.suppressed_counts[name],
+            }
+
+        return statistics
+
     def get_all_spread_names(self) -> List[str]:
         """"""
         return list(self.spreads.keys())
@@ -433,10 +773,19 @@ class SpreadAlgoEngine:
         self.algos: Dict[str, SpreadAlgoTemplate] = {}
 
         self.order_algo_map: Dict[str, SpreadAlgoTemplate] = {}
-        self.symbol_algo_map: Dict[str, List[SpreadAlgoTemplate]] = defaultdict(list)
+        self.symbol_algo_map: Dict[str, Dict[str, SpreadAlgoTemplate]] = defaultdict(dict)
+        self.algo_orderids: Dict[str, List[str]] = defaultdict(list)
+
+        # Changes of symbol_algo_map are deferred during tick dispatch
+        self.dispatching: bool = False
+        self.pending_changes: List[Tuple[str, str, Optional[SpreadAlgoTemplate]]] = []
+
+        # Heap of (deadline, sequence, algo) for calling on_interval of algos
+        self.timer_count: int = 0
+        self.timer_seq: int = 0
+        self.timer_heap: List[Tuple[int, int, SpreadAlgoTemplate]] = []
 
         self.algo_count: int = 0
-        self.vt_tradeids: set = set()
 
     def start(self) -> None:
         """"""
@@ -446,64 +795,100 @@ class SpreadAlgoEngine:
 
     def stop(self) -> None:
         """"""
-        for algo in self.algos.values():
-            self.stop_algo(algo)
+        for algo in list(self.algos.values()):
+            self.stop_algo(algo.algoid)
 
     def register_event(self) -> None:
         """"""
-        self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
-        self.event_engine.register(EVENT_TRADE, self.process_trade_event)
         self.event_engine.register(EVENT_TIMER, self.process_timer_event)
 
     def update_spread_data(self, spread: SpreadData) -> None:
         """"""
         self.spreads[spread.name] = spread
 
-    def process_tick_event(self, event: Event) -> None:
+    def update_tick(
+        self, tick: TickData, algos: Dict[str, SpreadAlgoTemplate]
+    ) -> None:
         """"""
-        tick: TickData = event.data
-        algos: List[SpreadAlgoTemplate] = self.symbol_algo_map[tick.vt_symbol]
-        if not algos:
-            return
+        self.dispatching = True
 
-        buf: List[SpreadAlgoTemplate] = copy(algos)
-        for algo in buf:
-            if not algo.is_active():
-                algos.remove(algo)
-            else:
+        # Algo finished by previous algo in this loop is skipped
+        for algo in algos.values():
+            if algo.is_active():
                 algo.update_tick(tick)
 
+        self.dispatching = False
+
+        if self.pending_changes:
+            for vt_symbol, algoid, algo in self.pending_changes:
+                self.update_symbol_algo(vt_symbol, algoid, algo)
+            self.pending_changes.clear()
+
+    def update_symbol_algo(
+        self, vt_symbol: str, algoid: str, algo: Optional[SpreadAlgoTemplate]
+    ) -> None:
+        """
+        Add algo into symbol_algo_map, or remove it if algo is None.
+        """
+        if self.dispatching:
+            self.pending_changes.append((vt_symbol, algoid, algo))
+        elif algo:
+            self.symbol_algo_map[vt_symbol][algoid] = algo
+        else:
+            self.symbol_algo_map[vt_symbol].pop(algoid, None)
+
     def process_order_event(self, event: Event) -> None:
         """"""
         order: OrderData = event.data
 
         algo: SpreadAlgoTemplate = self.order_algo_map.get(order.vt_orderid, None)
-        if algo and algo.is_active():
+        if not algo:
+            return
+
+        recorder: SpreadRecorder = self.spread_engine.recorder
+        if recorder.active:
+            recorder.record_order(order, algo.algoid)
+
+        if algo.is_active():
             algo.update_order(order)
 
-    def process_trade_event(self, event: Event) -> None:
+    def update_trade(self, trade: TradeData) -> None:
         """"""
-        trade: TradeData = event.data
-
-        # Filter duplicate trade push
-        if trade.vt_tradeid in self.vt_tradeids:
+        algo: SpreadAlgoTemplate = self.order_algo_map.get(trade.vt_orderid, None)
+        if not algo:
             return
-        self.vt_tradeids.add(trade.vt_tradeid)
 
-        algo: SpreadAlgoTemplate = self.order_algo_map.get(trade.vt_orderid, None)
-        if algo and algo.is_active():
+        recorder: SpreadRecorder = self.spread_engine.recorder
+        if recorder.active:
+            recorder.record_trade(trade, algo.algoid)
+
+        if algo.is_active():
             algo.update_trade(trade)
 
     def process_timer_event(self, event: Event) -> None:
-        """"""
-        buf: List[SpreadAlgoTemplate] = list(self.algos.values())
+        """
+        Only wake up algos whose interval is reached, finished algos are
+        dropped from the heap.
+        """
+        self.timer_count += 1
 
-        for algo in buf:
+        heap: List[Tuple[int, int, SpreadAlgoTemplate]] = self.timer_heap
+        while heap and heap[0][0] <= self.timer_count:
+            algo: SpreadAlgoTemplate = heappop(heap)[2]
             if not algo.is_active():
-                self.algos.pop(algo.algoid)
-            else:
-                algo.update_timer()
+                continue
+
+            self.schedule_timer(algo)
+            algo.update_timer()
+
+    def schedule_timer(self, algo: SpreadAlgoTemplate) -> None:
+        """Schedule the next on_interval of algo after interval seconds."""
+        algo.timer_start = self.timer_count
+
+        self.timer_seq += 1
+        deadline: int = self.timer_count + algo.interval + 1
+        heappush(self.timer_heap, (deadline, self.timer_seq, algo))
 
     def start_algo(
         self,
@@ -536,10 +921,11 @@ class SpreadAlgoEngine:
             self, algoid, spread, direction, price, volume, payup, interval, lock, extra
         )
         self.algos[algoid] = algo
+        self.schedule_timer(algo)
 
         # Generate map between vt_symbol and algo
         for leg in spread.legs.values():
-            self.symbol_algo_map[leg.vt_symbol].append(algo)
+            self.update_symbol_algo(leg.vt_symbol, algoid, algo)
 
         # Put event to update GUI
         self.put_algo_event(algo)
@@ -557,17 +943,45 @@ class SpreadAlgoEngine:
 
         algo.stop()
 
+    def finish_algo(self, algo: SpreadAlgoTemplate) -> None:
+        """
+        Remove finished algo from live algos and tick dispatch, and retire
+        it later.
+        """
+        if not self.algos.pop(algo.algoid, None):
+            return
+
+        for leg in algo.spread.legs.values():
+            self.update_symbol_algo(leg.vt_symbol, algo.algoid, None)
+
+        self.spread_engine.lifecycle.add_algo(algo)
+
+    def retire_algo(self, algo: SpreadAlgoTemplate) -> int:
+        """Remove orders of algo from all maps, return count of orders."""
+        vt_orderids: List[str] = self.algo_orderids.pop(algo.algoid, [])
+        for vt_orderid in vt_orderids:
+            self.order_algo_map.pop(vt_orderid, None)
+            self.data_engine.order_spread_map.pop(vt_orderid, None)
+
+        return len(vt_orderids)
+
     def put_algo_event(self, algo: SpreadAlgoTemplate) -> None:
         """"""
+        # Count of seconds is updated when algo pushed instead of every second
+        algo.count = self.timer_count - algo.timer_start
+
         self.spread_engine.update_spread_algo(algo)
+        self.spread_engine.put_gui_event(EVENT_SPREAD_ALGO, algo.algoid, algo.get_item)
 
-        event: Event = Event(EVENT_SPREAD_ALGO, algo.get_item())
-        self.event_engine.put(event)
+        if not algo.is_active():
+            self.finish_algo(algo)
 
-    def write_algo_log(self, algo: SpreadAlgoTemplate, msg: str) -> None:
+    def write_algo_log(
+        self, algo: SpreadAlgoTemplate, msg: str, level: int = INFO
+    ) -> None:
         """"""
         msg: str = f"{algo.algoid}：{msg}"
-        self.write_log(msg)
+        self.write_log(msg, level)
 
     def send_order(
         self,
@@ -580,8 +994,12 @@ class SpreadAlgoEngine:
         fak: bool,
     ) -> List[str]:
         """"""
+        # Use contract cached in leg, which is updated with contract event
+        contract: Optional[ContractData] = algo.spread.legs[vt_symbol].contract
+        if not contract:
+            contract = self.main_engine.get_contract(vt_symbol)
+
         # Creating the original order request
-        contract: Optional[ContractData] = self.main_engine.get_contract(vt_symbol)
 
         if fak:
             order_type: OrderType = OrderType.FAK
@@ -603,16 +1021,30 @@ class SpreadAlgoEngine:
         net: bool = not lock
 
         # Perform order conversions
+        monitor: LatencyMonitor = self.spread_engine.latency_monitor
+        if monitor.active:
+            t0: int = perf_counter_ns()
+
         req_list: List[OrderRequest] = self.main_engine.convert_order_request(
             original_req, contract.gateway_name, lock, net
         )
 
+        if monitor.active:
+            monitor.record("convert_order_request", perf_counter_ns() - t0)
+
         # Send Orders
         vt_orderids: list = []
 
         for req in req_list:
+            if monitor.active:
+                monitor.record_tick_to_order()
+                t0: int = perf_counter_ns()
+
             vt_orderid: str = self.main_engine.send_order(req, contract.gateway_name)
 
+            if monitor.active:
+                monitor.record("send_order", perf_counter_ns() - t0)
+
             # Check if sending order successful
             if not vt_orderid:
                 continue
@@ -625,6 +1057,7 @@ class SpreadAlgoEngine:
 
             # Save relationship between orderid and algo.
             self.order_algo_map[vt_orderid] = algo
+            self.algo_orderids[algo.algoid].append(vt_orderid)
 
             # Cache the relationship between the order number and the spread
             self.data_engine.update_order_spread_map(vt_orderid, algo.spread)
@@ -659,6 +1092,9 @@ class SpreadStrategyEngine:
 
     setting_filename: str = "spread_trading_strategy.json"
 
+    # Load spread bars through on-disk cache
+    bar_cache_active: bool = False
+
     def __init__(self, spread_engine: SpreadEngine) -> None:
         """"""
         self.spread_engine: SpreadEngine = spread_engine
@@ -678,8 +1114,6 @@ class SpreadStrategyEngine:
             list
         )
 
-        self.vt_tradeids: set = set()
-
         self.load_strategy_class()
 
     def start(self) -> None:
@@ -781,7 +1215,6 @@ class SpreadStrategyEngine:
         """"""
         ee: EventEngine = self.event_engine
         ee.register(EVENT_ORDER, self.process_order_event)
-        ee.register(EVENT_TRADE, self.process_trade_event)
 
     def update_spread_data(self, spread: SpreadData) -> None:
         """"""
@@ -816,9 +1249,11 @@ class SpreadStrategyEngine:
         if strategy:
             self.call_strategy_func(strategy, strategy.update_order, order)
 
-    def process_trade_event(self, event: Event) -> None:
+            if not order.is_active():
+                self.spread_engine.lifecycle.add_order(order.vt_orderid)
+
+    def update_trade(self, trade: TradeData) -> None:
         """"""
-        trade: TradeData = event.data
         strategy: SpreadStrategyTemplate = self.order_strategy_map.get(
             trade.vt_orderid, None
         )
@@ -915,6 +1350,9 @@ class SpreadStrategyEngine:
         # Remove from strategies
         self.strategies.pop(strategy_name)
 
+        # Remove pending GUI event to avoid showing removed strategy again
+        self.spread_engine.publisher.remove(EVENT_SPREAD_STRATEGY, strategy_name)
+
         return True
 
     def init_strategy(self, strategy_name: str) -> None:
@@ -1098,14 +1536,16 @@ class SpreadStrategyEngine:
 
     def put_strategy_event(self, strategy: SpreadStrategyTemplate) -> None:
         """"""
-        data: dict = strategy.get_data()
-        event: Event = Event(EVENT_SPREAD_STRATEGY, data)
-        self.event_engine.put(event)
+        self.spread_engine.put_gui_event(
+            EVENT_SPREAD_STRATEGY, strategy.strategy_name, strategy.get_data
+        )
 
-    def write_strategy_log(self, strategy: SpreadStrategyTemplate, msg: str) -> None:
+    def write_strategy_log(
+        self, strategy: SpreadStrategyTemplate, msg: str, level: int = INFO
+    ) -> None:
         """"""
         msg: str = f"{strategy.strategy_name}：{msg}"
-        self.write_log(msg)
+        self.write_log(msg, level)
 
     def send_email(self, msg: str, strategy: SpreadStrategyTemplate = None) -> None:
         """"""
@@ -1127,9 +1567,14 @@ class SpreadStrategyEngine:
         end: datetime = datetime.now()
         start: datetime = end - timedelta(days)
 
-        bars: List[BarData] = load_bar_data(
-            spread, interval, start, end, output=self.write_log
-        )
+        if self.bar_cache_active:
+            bars: Sequence[BarData] = get_bar_cache().load_bar_data(
+                spread, interval, start, end, output=self.write_log
+            )
+        else:
+            bars: Sequence[BarData] = load_bar_data(
+                spread, interval, start, end, output=self.write_log
+            )
 
         for bar in bars:
             callback(bar)
@@ -1143,3 +1588,166 @@ class SpreadStrategyEngine:
 
         for tick in ticks:
             callback(tick)
+
+
+class SpreadEventPublisher:
+    """
+    Publisher of GUI events, which only keeps the latest snapshot of each
+    spread/algo/strategy and pushes them at fixed frequency.
+
+    Timer thread only puts flush event, data of GUI events are generated
+    on event engine thread so that they are consistent with trading logic.
+    """
+
+    def __init__(self, event_engine: EventEngine, frequency: int) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+        self.frequency: int = frequency
+
+        self.active: bool = False
+        self.buf: Dict[tuple, Callable] = {}
+        self.lock: Lock = Lock()
+
+        # Whether flush event put but not processed yet
+        self.pending: bool = False
+
+        self.stop_event: ThreadEvent = ThreadEvent()
+        self.thread: Thread = None
+
+    def start(self) -> None:
+        """"""
+        if self.active or not self.frequency:
+            return
+        self.active = True
+
+        self.event_engine.register(EVENT_SPREAD_FLUSH, self.process_flush_event)
+
+        self.stop_event.clear()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """"""
+        if not self.active:
+            return
+        self.active = False
+
+        self.stop_event.set()
+        self.thread.join()
+
+        # Push remaining data with the last flush event
+        self.event_engine.put(Event(EVENT_SPREAD_FLUSH))
+
+    def put(self, event_type: str, key: str, get_data: Callable) -> None:
+        """
+        Put data of GUI event, get_data is called when event is pushed.
+        """
+        if not self.active:
+            self.event_engine.put(Event(event_type, get_data()))
+            return
+
+        with self.lock:
+            self.buf[(event_type, key)] = get_data
+
+    def remove(self, event_type: str, key: str) -> None:
+        """"""
+        with self.lock:
+            self.buf.pop((event_type, key), None)
+
+    def process_flush_event(self, event: Event) -> None:
+        """"""
+        self.pending = False
+        self.flush()
+
+    def flush(self) -> None:
+        """Generate and push buffered GUI events, called on event engine thread."""
+        with self.lock:
+            buf: Dict[tuple, Callable] = self.buf
+            self.buf = {}
+
+        for (event_type, _), get_data in buf.items():
+            self.event_engine.put(Event(event_type, get_data()))
+
+    def run(self) -> None:
+        """"""
+        interval: float = 1 / self.frequency
+
+        while not self.stop_event.wait(interval):
+            # Skip if last flush event still waiting in event queue
+            if self.pending:
+                continue
+
+            self.pending = True
+            self.event_engine.put(Event(EVENT_SPREAD_FLUSH))
+
+
+class SpreadLifecycleManager:
+    """
+    Manager of finished algos and strategy orders, which are removed from
+    all maps of sub engines after the retire delay (in seconds) so that
+    late order and trade push can still be processed.
+    """
+
+    def __init__(self, spread_engine: SpreadEngine, retire_delay: int) -> None:
+        """"""
+        self.spread_engine: SpreadEngine = spread_engine
+        self.retire_delay: int = retire_delay
+
+        self.timer_count: int = 0
+
+        # Retire delay is constant, so the queues are ordered by deadline
+        self.algo_queue: Deque[Tuple[int, SpreadAlgoTemplate]] = deque()
+        self.order_queue: Deque[Tuple[int, str]] = deque()
+
+        self.retired_algo_count: int = 0
+        self.retired_order_count: int = 0
+
+    def add_algo(self, algo: SpreadAlgoTemplate) -> None:
+        """"""
+        self.algo_queue.append((self.timer_count + self.retire_delay, algo))
+
+    def add_order(self, vt_orderid: str) -> None:
+        """Add finished order sent by strategy directly."""
+        self.order_queue.append((self.timer_count + self.retire_delay, vt_orderid))
+
+    def process_timer_event(self, event: Event) -> None:
+        """"""
+        self.timer_count += 1
+
+        algo_queue: Deque[Tuple[int, SpreadAlgoTemplate]] = self.algo_queue
+        if algo_queue and algo_queue[0][0] <= self.timer_count:
+            algo_engine: SpreadAlgoEngine = self.spread_engine.algo_engine
+            algo_strategy_map: dict = self.spread_engine.strategy_engine.algo_strategy_map
+
+            while algo_queue and algo_queue[0][0] <= self.timer_count:
+                algo: SpreadAlgoTemplate = algo_queue.popleft()[1]
+
+                self.retired_order_count += algo_engine.retire_algo(algo)
+                algo_strategy_map.pop(algo.algoid, None)
+                self.retired_algo_count += 1
+
+        order_queue: Deque[Tuple[int, str]] = self.order_queue
+        if order_queue and order_queue[0][0] <= self.timer_count:
+            order_strategy_map: dict = self.spread_engine.strategy_engine.order_strategy_map
+
+            while order_queue and order_queue[0][0] <= self.timer_count:
+                vt_orderid: str = order_queue.popleft()[1]
+
+                order_strategy_map.pop(vt_orderid, None)
+                self.retired_order_count += 1
+
+    def get_statistics(self) -> Dict[str, int]:
+        """"""
+        algo_engine: SpreadAlgoEngine = self.spread_engine.algo_engine
+        strategy_engine: SpreadStrategyEngine = self.spread_engine.strategy_engine
+
+        return {
+            "live_algo": len(algo_engine.algos),
+            "finished_algo": len(self.algo_queue),
+            "retired_algo": self.retired_algo_count,
+            "finished_order": len(self.order_queue),
+            "retired_order": self.retired_order_count,
+            "order_algo_map": len(algo_engine.order_algo_map),
+            "order_spread_map": len(self.spread_engine.data_engine.order_spread_map),
+            "order_strategy_map": len(strategy_engine.order_strategy_map),
+        }
@@ -0,0 +1,365 @@
+import json
+import struct
+import traceback
+from collections import deque, defaultdict
+from datetime import datetime
+from pathlib import Path
+from threading import Thread, Event
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Tuple
+
+import numpy as np
+
+from vnpy.trader.constant import Direction, Offset, Status
+from vnpy.trader.object import TickData, OrderData, TradeData
+from vnpy.trader.utility import get_folder_path
+
+from .base import SpreadData
+
+
+# Record kinds, string table is written before records using the strings,
+# and indexes of records after reset refer to a new string table
+STRING = 0
+TICK = 1
+SPREAD = 2
+ORDER = 3
+TRADE = 4
+RESET = 5
+
+KIND_NAMES: Dict[int, str] = {
+    TICK: "tick",
+    SPREAD: "spread",
+    ORDER: "order",
+    TRADE: "trade",
+}
+
+# Each chunk starts with kind and byte length of data
+CHUNK_HEADER: struct.Struct = struct.Struct("<BI")
+
+# Fields with dtype "u4" are indexes of string table
+RECORD_DTYPES: Dict[int, np.dtype] = {
+    TICK: np.dtype([
+        ("datetime", "f8"),
+        ("vt_symbol", "u4"),
+        ("bid_price_1", "f8"),
+        ("ask_price_1", "f8"),
+        ("bid_volume_1", "f8"),
+        ("ask_volume_1", "f8"),
+        ("last_price", "f8"),
+        ("volume", "f8"),
+    ]),
+    SPREAD: np.dtype([
+        ("datetime", "f8"),
+        ("name", "u4"),
+        ("bid_price", "f8"),
+        ("ask_price", "f8"),
+        ("bid_volume", "f8"),
+        ("ask_volume", "f8"),
+    ]),
+    ORDER: np.dtype([
+        ("datetime", "f8"),
+        ("algoid", "u4"),
+        ("vt_orderid", "u4"),
+        ("vt_symbol", "u4"),
+        ("direction", "i1"),
+        ("offset", "i1"),
+        ("status", "i1"),
+        ("price", "f8"),
+        ("volume", "f8"),
+        ("traded", "f8"),
+    ]),
+    TRADE: np.dtype([
+        ("datetime", "f8"),
+        ("algoid", "u4"),
+        ("vt_orderid", "u4"),
+        ("vt_tradeid", "u4"),
+        ("vt_symbol", "u4"),
+        ("direction", "i1"),
+        ("offset", "i1"),
+        ("price", "f8"),
+        ("volume", "f8"),
+    ]),
+}
+
+DIRECTION_CODES: Dict[Direction, int] = {
+    Direction.LONG: 1,
+    Direction.SHORT: -1,
+    Direction.NET: 0,
+}
+OFFSET_LIST: List[Offset] = list(Offset)
+OFFSET_CODES: Dict[Offset, int] = {offset: n for n, offset in enumerate(OFFSET_LIST)}
+STATUS_LIST: List[Status] = list(Status)
+STATUS_CODES: Dict[Status, int] = {status: n for n, status in enumerate(STATUS_LIST)}
+
+
+class SpreadRecorder:
+    """
+    Recorder of leg ticks, spread quotes, algo orders and trades.
+
+    Data is handed over with a deque (append and popleft are atomic), and
+    converted into binary chunks of numpy structured array on background
+    thread.
+    """
+
+    # Max number of strings in table before it is reset
+    string_limit: int = 100000
+
+    def __init__(self, interval: float = 0.2, output: Callable = print) -> None:
+        """"""
+        self.interval: float = interval
+        self.output: Callable = output
+
+        self.active: bool = False
+        self.queue: Deque[tuple] = deque()
+
+        self.file_path: Path = None
+        self.file: BinaryIO = None
+        self.strings: Dict[str, int] = {}
+        self.reset_pending: bool = False
+
+        self.stop_event: Event = Event()
+        self.thread: Thread = None
+
+    def start(self, file_path: Path = None) -> None:
+        """"""
+        if self.active:
+            return
+        self.active = True
+
+        if not file_path:
+            folder_path: Path = get_folder_path("spread_record")
+            file_path = folder_path.joinpath(
+                datetime.now().strftime("%Y%m%d_%H%M%S") + ".dat"
+            )
+        self.file_path = file_path
+
+        self.file = open(file_path, mode="wb")
+        self.strings = {}
+        self.reset_pending = False
+
+        self.stop_event.clear()
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop background thread after all pending data written."""
+        if not self.active:
+            return
+        self.active = False
+
+        self.stop_event.set()
+        self.thread.join()
+
+        self.file.close()
+
+    def record_tick(self, tick: TickData) -> None:
+        """"""
+        self.queue.append((TICK, tick))
+
+    def record_spread(self, spread: SpreadData) -> None:
+        """"""
+        self.queue.append((
+            SPREAD,
+            (
+                spread.datetime,
+                spread.name,
+                spread.bid_price,
+                spread.ask_price,
+                spread.bid_volume,
+                spread.ask_volume,
+            )
+        ))
+
+    def record_order(self, order: OrderData, algoid: str) -> None:
+        """"""
+        # Status and traded are copied in case order object is updated later
+        self.queue.append((ORDER, order, algoid, order.status, order.traded))
+
+    def record_trade(self, trade: TradeData, algoid: str) -> None:
+        """"""
+        self.queue.append((TRADE, trade, algoid))
+
+    def run(self) -> None:
+        """"""
+        while not self.stop_event.wait(self.interval):
+            self.process()
+
+        self.process()
+
+    def process(self) -> None:
+        """Write all pending data in queue."""
+        if not self.queue:
+            return
+
+        # Restart string table to keep memory bounded
+        if len(self.strings) >= self.string_limit:
+            self.strings = {}
+            self.reset_pending = True
+
+        strings: Dict[str, int] = self.strings
+        rows: Dict[int, list] = defaultdict(list)
+        new_strings: Dict[str, int] = {}
+
+        # New strings are added into table only after written into file
+        def get_index(s: str) -> int:
+            index: int = strings.get(s, None)
+            if index is None:
+                index = new_strings.get(s, None)
+                if index is None:
+                    index = len(strings) + len(new_strings)
+                    new_strings[s] = index
+            return index
+
+        queue: Deque[tuple] = self.queue
+        try:
+            while queue:
+                item: tuple = queue.popleft()
+                kind: int = item[0]
+
+                if kind == TICK:
+                    tick: TickData = item[1]
+                    row: tuple = (
+                        get_timestamp(tick.datetime),
+                        get_index(tick.vt_symbol),
+                        tick.bid_price_1,
+                        tick.ask_price_1,
+                        tick.bid_volume_1,
+                        tick.ask_volume_1,
+                        tick.last_price,
+                        tick.volume,
+                    )
+                elif kind == SPREAD:
+                    dt, name, bid_price, ask_price, bid_volume, ask_volume = item[1]
+                    row: tuple = (
+                        get_timestamp(dt),
+                        get_index(name),
+                        bid_price,
+                        ask_price,
+                        bid_volume,
+                        ask_volume,
+                    )
+                elif kind == ORDER:
+                    order: OrderData = item[1]
+                    row: tuple = (
+                        get_timestamp(order.datetime),
+                        get_index(item[2]),
+                        get_index(order.vt_orderid),
+                        get_index(order.vt_symbol),
+                        DIRECTION_CODES.get(order.direction, 0),
+                        OFFSET_CODES.get(order.offset, 0),
+                        STATUS_CODES.get(item[3], 0),
+                        order.price,
+                        order.volume,
+                        item[4],
+                    )
+                else:
+                    trade: TradeData = item[1]
+                    row: tuple = (
+                        get_timestamp(trade.datetime),
+                        get_index(item[2]),
+                        get_index(trade.vt_orderid),
+                        get_index(trade.vt_tradeid),
+                        get_index(trade.vt_symbol),
+                        DIRECTION_CODES.get(trade.direction, 0),
+                        OFFSET_CODES.get(trade.offset, 0),
+                        trade.price,
+                        trade.volume,
+                    )
+
+                rows[kind].append(row)
+
+            if self.reset_pending:
+                self.write_chunk(RESET, b"")
+                self.reset_pending = False
+
+            # Strings must be written before records referring to them
+            if new_strings:
+                self.write_chunk(STRING, json.dumps(list(new_strings)).encode("UTF-8"))
+
+            for kind, kind_rows in rows.items():
+                data: np.ndarray = np.array(kind_rows, dtype=RECORD_DTYPES[kind])
+                self.write_chunk(kind, data.tobytes())
+
+            self.file.flush()
+            strings.update(new_strings)
+        except Exception:
+            self.output(f"Failed to write spread record:\n{traceback.format_exc()}")
+
+            # Strings written before failure are unknown, so table is restarted
+            self.strings = {}
+            self.reset_pending = True
+
+    def write_chunk(self, kind: int, data: bytes) -> None:
+        """"""
+        self.file.write(CHUNK_HEADER.pack(kind, len(data)))
+        self.file.write(data)
+
+
+def get_timestamp(dt: datetime) -> float:
+    """Get POSIX timestamp of datetime, 0 if not available."""
+    if not dt:
+        return 0
+    return dt.timestamp()
+
+
+def load_record_data(file_path: Path) -> Dict[str, Dict[str, np.ndarray]]:
+    """
+    Load data recorded by SpreadRecorder, return arrays of each field for
+    tick, spread, order and trade. String fields are decoded into object
+    arrays, direction, offset and status are kept as integer codes.
+    """
+    # Tables of all resets are joined, with offset of each record chunk
+    strings: List[str] = []
+    offset: int = 0
+    chunks: Dict[int, List[bytes]] = defaultdict(list)
+    offsets: Dict[int, List[int]] = defaultdict(list)
+
+    with open(file_path, mode="rb") as f:
+        while True:
+            header: bytes = f.read(CHUNK_HEADER.size)
+            if len(header) < CHUNK_HEADER.size:
+                break
+
+            kind, size = CHUNK_HEADER.unpack(header)
+            data: bytes = f.read(size)
+
+            # Skip incomplete chunk written before crash
+            if len(data) < size:
+                break
+
+            if kind == STRING:
+                strings.extend(json.loads(data.decode("UTF-8")))
+            elif kind == RESET:
+                offset = len(strings)
+            else:
+                chunks[kind].append(data)
+                offsets[kind].append(offset)
+
+    string_array: np.ndarray = np.array(strings, dtype=object)
+
+    result: Dict[str, Dict[str, np.ndarray]] = {}
+
+    for kind, name in KIND_NAMES.items():
+        dtype: np.dtype = RECORD_DTYPES[kind]
+        records: np.ndarray = np.frombuffer(b"".join(chunks[kind]), dtype=dtype)
+
+        counts: List[int] = [len(data) // dtype.itemsize for data in chunks[kind]]
+        record_offsets: np.ndarray = np.repeat(
+            np.array(offsets[kind], dtype=np.int64), counts
+        )
+
+        fields: Dict[str, Any] = {}
+        for field in dtype.names:
+            values: np.ndarray = records[field]
+            if dtype[field] == np.dtype("u4"):
+                values = string_array[values + record_offsets]
+            fields[field] = values
+
+        result[name] = fields
+
+    return result
+
+
+def get_record_codes() -> Tuple[Dict[int, Direction], List[Offset], List[Status]]:
+    """Get mapping of integer codes of direction, offset and status."""
+    directions: Dict[int, Direction] = {v: k for k, v in DIRECTION_CODES.items()}
+    return directions, OFFSET_LIST, STATUS_LIST
@@ -0,0 +1,403 @@
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from time import perf_counter
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Type
+
+import numpy as np
+
+from vnpy.event import EventEngine, Event
+from vnpy.trader.constant import Direction, Exchange, OrderType, Status
+from vnpy.trader.database import DB_TZ
+from vnpy.trader.event import (
+    EVENT_TICK,
+    EVENT_ORDER,
+    EVENT_TRADE,
+    EVENT_TIMER,
+    EVENT_CONTRACT,
+)
+from vnpy.trader.object import (
+    TickData,
+    OrderData,
+    TradeData,
+    ContractData,
+    PositionData,
+    OrderRequest,
+    CancelRequest,
+    SubscribeRequest,
+)
+
+from .base import SpreadData, EVENT_SPREAD_LOG
+from .engine import SpreadEngine, SpreadStrategyEngine
+from .recorder import load_record_data
+from .template import SpreadStrategyTemplate
+
+
+class ReplayEventEngine(EventEngine):
+    """
+    Event engine without threads for replay. Events are processed in the
+    same order as put when process_events is called, so that events put
+    by handlers are processed after the current one.
+    """
+
+    def __init__(self) -> None:
+        """"""
+        super().__init__()
+
+        self.events: Deque[Event] = deque()
+
+    def start(self) -> None:
+        """"""
+        pass
+
+    def stop(self) -> None:
+        """"""
+        pass
+
+    def put(self, event: Event) -> None:
+        """"""
+        self.events.append(event)
+
+    def process_events(self) -> None:
+        """Process all pending events."""
+        events: Deque[Event] = self.events
+        while events:
+            self._process(events.popleft())
+
+
+class ReplayMainEngine:
+    """
+    Stand-in of MainEngine for replay, limit orders of each leg are
+    matched with the next tick of the leg.
+    """
+
+    gateway_name: str = "REPLAY"
+
+    def __init__(self, event_engine: EventEngine) -> None:
+        """"""
+        self.event_engine: EventEngine = event_engine
+
+        self.contracts: Dict[str, ContractData] = {}
+        self.ticks: Dict[str, TickData] = {}
+        self.orders: Dict[str, OrderData] = {}
+        self.trades: List[TradeData] = []
+        self.active_orders: Dict[str, Dict[str, OrderData]] = {}
+
+        self.order_count: int = 0
+        self.trade_count: int = 0
+        self.datetime: datetime = None
+
+        # Called with order/trade data, push event by default
+        self.on_order: Callable = self.put_order
+        self.on_trade: Callable = self.put_trade
+
+    def add_contract(self, contract: ContractData) -> None:
+        """"""
+        self.contracts[contract.vt_symbol] = contract
+        self.event_engine.put(Event(EVENT_CONTRACT, contract))
+
+    def update_tick(self, tick: TickData) -> None:
+        """Match active orders of leg with the new tick."""
+        self.datetime = tick.datetime
+        self.ticks[tick.vt_symbol] = tick
+
+        active_orders: Optional[Dict[str, OrderData]] = self.active_orders.get(
+            tick.vt_symbol, None
+        )
+        if active_orders:
+            self.cross_order(tick, active_orders)
+
+    def cross_order(self, tick: TickData, active_orders: Dict[str, OrderData]) -> None:
+        """"""
+        for order in list(active_orders.values()):
+            if order.direction == Direction.LONG:
+                cross: bool = 0 < tick.ask_price_1 <= order.price
+                trade_price: float = tick.ask_price_1
+            else:
+                cross: bool = 0 < order.price <= tick.bid_price_1
+                trade_price: float = tick.bid_price_1
+
+            if not cross:
+                # FAK order is cancelled if not traded with the first tick
+                if order.type == OrderType.FAK:
+                    order.status = Status.CANCELLED
+                    active_orders.pop(order.vt_orderid)
+                    self.on_order(order)
+                continue
+
+            order.traded = order.volume
+            order.status = Status.ALLTRADED
+            active_orders.pop(order.vt_orderid)
+            self.on_order(order)
+
+            self.trade_count += 1
+            trade: TradeData = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=str(self.trade_count),
+                direction=order.direction,
+                offset=order.offset,
+                price=trade_price,
+                volume=order.volume,
+                datetime=tick.datetime,
+                gateway_name=self.gateway_name,
+            )
+            self.trades.append(trade)
+            self.on_trade(trade)
+
+    def put_order(self, order: OrderData) -> None:
+        """"""
+        self.event_engine.put(Event(EVENT_ORDER, order))
+
+    def put_trade(self, trade: TradeData) -> None:
+        """"""
+        self.event_engine.put(Event(EVENT_TRADE, trade))
+
+    def send_order(self, req: OrderRequest, gateway_name: str) -> str:
+        """"""
+        self.order_count += 1
+
+        order: OrderData = req.create_order_data(str(self.order_count), self.gateway_name)
+        order.status = Status.NOTTRADED
+        order.datetime = self.datetime
+
+        self.orders[order.vt_orderid] = order
+        self.active_orders.setdefault(order.vt_symbol, {})[order.vt_orderid] = order
+        self.on_order(order)
+
+        return order.vt_orderid
+
+    def cancel_order(self, req: CancelRequest, gateway_name: str) -> None:
+        """"""
+        active_orders: Dict[str, OrderData] = self.active_orders.get(req.vt_symbol, {})
+
+        vt_orderid: str = f"{self.gateway_name}.{req.orderid}"
+        order: Optional[OrderData] = active_orders.pop(vt_orderid, None)
+        if not order:
+            return
+
+        order.status = Status.CANCELLED
+        self.on_order(order)
+
+    def convert_order_request(
+        self, req: OrderRequest, gateway_name: str, lock: bool, net: bool = False
+    ) -> List[OrderRequest]:
+        """"""
+        return [req]
+
+    def update_order_request(
+        self, req: OrderRequest, vt_orderid: str, gateway_name: str
+    ) -> None:
+        """"""
+        pass
+
+    def subscribe(self, req: SubscribeRequest, gateway_name: str) -> None:
+        """"""
+        pass
+
+    def get_datetime(self) -> datetime:
+        """Get time of the last replayed tick."""
+        return self.datetime
+
+    def get_contract(self, vt_symbol: str) -> Optional[ContractData]:
+        """"""
+        return self.contracts.get(vt_symbol, None)
+
+    def get_tick(self, vt_symbol: str) -> Optional[TickData]:
+        """"""
+        return self.ticks.get(vt_symbol, None)
+
+    def get_order(self, vt_orderid: str) -> Optional[OrderData]:
+        """"""
+        return self.orders.get(vt_orderid, None)
+
+    def get_all_positions(self) -> List[PositionData]:
+        """"""
+        return []
+
+    def send_email(self, subject: str, content: str, receiver: str = "") -> None:
+        """"""
+        pass
+
+
+class SpreadReplayEngine:
+    """
+    Replay leg ticks through the live SpreadEngine (data, algo and strategy
+    engines) with simulated order matching, as fast as possible.
+
+    Setting, position and strategy files are neither loaded nor saved, and
+    GUI events are not pushed.
+    """
+
+    def __init__(self, output: Callable = print) -> None:
+        """"""
+        self.output: Callable = output
+
+        self.event_engine: ReplayEventEngine = ReplayEventEngine()
+        self.main_engine: ReplayMainEngine = ReplayMainEngine(self.event_engine)
+
+        self.spread_engine: SpreadEngine = SpreadEngine(
+            self.main_engine, self.event_engine
+        )
+        self.spread_engine.put_gui_event = self.put_gui_event
+
+        self.tick_count: int = 0
+        self.elapsed: float = 0
+        self.timer_time: float = 0
+
+        self.event_engine.register(EVENT_SPREAD_LOG, self.process_log_event)
+
+        self.spread_engine.register_event()
+        self.spread_engine.data_engine.register_event()
+        self.spread_engine.algo_engine.register_event()
+        self.spread_engine.strategy_engine.register_event()
+
+    def add_contract(self, contract: ContractData) -> None:
+        """Contracts of all legs must be added before adding spread."""
+        self.main_engine.add_contract(contract)
+        self.event_engine.process_events()
+
+    def add_spread(
+        self,
+        name: str,
+        leg_settings: List[Dict],
+        price_formula: str,
+        active_symbol: str,
+        min_volume: float,
+    ) -> Optional[SpreadData]:
+        """"""
+        self.spread_engine.data_engine.add_spread(
+            name, leg_settings, price_formula, active_symbol, min_volume, save=False
+        )
+        self.event_engine.process_events()
+
+        # Calculate time of spread follows replayed ticks
+        spread: Optional[SpreadData] = self.spread_engine.get_spread(name)
+        if spread:
+            spread.clock = self.main_engine.get_datetime
+        return spread
+
+    def start_algo(
+        self,
+        spread_name: str,
+        direction: Direction,
+        price: float,
+        volume: float,
+        payup: int,
+        interval: int,
+        lock: bool = False,
+        extra: dict = None,
+    ) -> str:
+        """"""
+        algoid: str = self.spread_engine.start_algo(
+            spread_name, direction, price, volume, payup, interval, lock, extra or {}
+        )
+        self.event_engine.process_events()
+        return algoid
+
+    def add_strategy(
+        self,
+        strategy_class: Type[SpreadStrategyTemplate],
+        strategy_name: str,
+        spread_name: str,
+        setting: dict,
+    ) -> SpreadStrategyTemplate:
+        """Add strategy, and then initialize and start it."""
+        strategy_engine: SpreadStrategyEngine = self.spread_engine.strategy_engine
+        spread: SpreadData = self.spread_engine.get_spread(spread_name)
+
+        strategy: SpreadStrategyTemplate = strategy_class(
+            strategy_engine, strategy_name, spread, setting
+        )
+        strategy_engine.strategies[strategy_name] = strategy
+        strategy_engine.spread_strategy_map[spread_name].append(strategy)
+
+        strategy_engine.init_strategy(strategy_name)
+        strategy_engine.start_strategy(strategy_name)
+        self.event_engine.process_events()
+
+        return strategy
+
+    def run(self, ticks: Iterable[TickData]) -> None:
+        """
+        Replay leg ticks in order, timer event is put for each second
+        passed (at most 60 for one tick).
+        """
+        event_engine: ReplayEventEngine = self.event_engine
+        main_engine: ReplayMainEngine = self.main_engine
+
+        start: float = perf_counter()
+
+        for tick in ticks:
+            timestamp: float = tick.datetime.timestamp()
+            if not self.timer_time:
+                self.timer_time = timestamp
+
+            seconds: int = int(timestamp - self.timer_time)
+            if seconds > 0:
+                self.timer_time += seconds
+
+                for _ in range(min(seconds, 60)):
+                    event_engine.put(Event(EVENT_TIMER))
+                event_engine.process_events()
+
+            main_engine.update_tick(tick)
+            event_engine.process_events()
+
+            event_engine.put(Event(EVENT_TICK, tick))
+            event_engine.process_events()
+
+            self.tick_count += 1
+
+        self.elapsed += perf_counter() - start
+
+    def get_statistics(self) -> dict:
+        """"""
+        if self.elapsed:
+            tick_speed: float = self.tick_count / self.elapsed
+        else:
+            tick_speed: float = 0
+
+        return {
+            "tick_count": self.tick_count,
+            "order_count": self.main_engine.order_count,
+            "trade_count": self.main_engine.trade_count,
+            "elapsed": self.elapsed,
+            "tick_speed": tick_speed,
+            "latency": self.spread_engine.get_latency_statistics(),
+        }
+
+    def put_gui_event(self, event_type: str, key: str, get_data: Callable) -> None:
+        """GUI event is not pushed in replay."""
+        pass
+
+    def process_log_event(self, event: Event) -> None:
+        """"""
+        self.output(event.data.msg)
+
+
+def load_recorded_ticks(file_path: Path) -> List[TickData]:
+    """Load leg ticks recorded by SpreadRecorder."""
+    data: Dict[str, np.ndarray] = load_record_data(file_path)["tick"]
+
+    ticks: List[TickData] = []
+
+    for n, vt_symbol in enumerate(data["vt_symbol"]):
+        symbol, exchange_str = vt_symbol.rsplit(".", 1)
+
+        tick: TickData = TickData(
+            symbol=symbol,
+            exchange=Exchange(exchange_str),
+            datetime=datetime.fromtimestamp(data["datetime"][n], DB_TZ),
+            bid_price_1=float(data["bid_price_1"][n]),
+            ask_price_1=float(data["ask_price_1"][n]),
+            bid_volume_1=float(data["bid_volume_1"][n]),
+            ask_volume_1=float(data["ask_volume_1"][n]),
+            last_price=float(data["last_price"][n]),
+            volume=float(data["volume"][n]),
+            gateway_name=ReplayMainEngine.gateway_name,
+        )
+        ticks.append(tick)
+
+    return ticks
@@ -1,4 +1,5 @@
 from collections import defaultdict
+from logging import INFO
 from typing import Dict, List, Set, Callable, TYPE_CHECKING, Optional
 from copy import copy
 
@@ -19,6 +20,9 @@ class SpreadAlgoTemplate:
 
     algo_name: str = "AlgoTemplate"
 
+    # Logs with level lower than this are dropped before formatting
+    log_level: int = INFO
+
     def __init__(
         self,
         algo_engine: "SpreadAlgoEngine",
@@ -53,6 +57,7 @@ class SpreadAlgoTemplate:
 
         self.status: Status = Status.NOTTRADED  # Algorithm status
         self.count: int = 0  # Count of seconds
+        self.timer_start: int = 0  # Timer count of the last interval
         self.traded: float = 0  # Number of trades
         self.traded_volume: float = 0  # Number of transactradestions (absolute value)
         self.traded_price: float = 0  # Traded price
@@ -174,10 +179,10 @@ class SpreadAlgoTemplate:
 
         # Remove order from active list if all volume traded
         order: OrderData = self.orders[trade.vt_orderid]
-        contract: Optional[ContractData] = self.get_contract(trade.vt_symbol)
+        leg: LegData = self.spread.legs[trade.vt_symbol]
 
         trade_volume = round_to(
-            self.order_trade_volume[order.vt_orderid], contract.min_volume
+            self.order_trade_volume[order.vt_orderid], leg.min_volume
         )
 
         if trade_volume == order.volume:
@@ -185,14 +190,14 @@ class SpreadAlgoTemplate:
             if order.vt_orderid in vt_orderids:
                 vt_orderids.remove(order.vt_orderid)
 
-        msg: str = "Trading order [{}], {}, {}, {}@{}".format(
+        self.write_log(
+            "Trading order [{}], {}, {}, {}@{}",
             trade.vt_orderid,
             trade.vt_symbol,
             trade.direction.value,
             trade.volume,
             trade.price,
         )
-        self.write_log(msg)
 
         self.put_event()
         self.on_trade(trade)
@@ -207,8 +212,7 @@ class SpreadAlgoTemplate:
             if order.vt_orderid in vt_orderids:
                 vt_orderids.remove(order.vt_orderid)
 
-            msg: str = "Order {}[{}]".format(order.status.value, order.vt_orderid)
-            self.write_log(msg)
+            self.write_log("Order {}[{}]", order.status.value, order.vt_orderid)
 
         self.on_order(order)
 
@@ -216,11 +220,9 @@ class SpreadAlgoTemplate:
         self.check_algo_cancelled()
 
     def update_timer(self) -> None:
-        """"""
-        self.count += 1
-        if self.count > self.interval:
-            self.count = 0
-            self.on_interval()
+        """Called by algo engine every interval seconds."""
+        self.count = 0
+        self.on_interval()
 
         self.put_event()
 
@@ -228,9 +230,17 @@ class SpreadAlgoTemplate:
         """"""
         self.algo_engine.put_algo_event(self)
 
-    def write_log(self, msg: str) -> None:
-        """"""
-        self.algo_engine.write_algo_log(self, msg)
+    def write_log(self, msg: str, *args, level: int = INFO) -> None:
+        """
+        Write log only if level is enabled, msg is formatted with args
+        after level checked.
+        """
+        if level < self.log_level:
+            return
+
+        if args:
+            msg = msg.format(*args)
+        self.algo_engine.write_algo_log(self, msg, level)
 
     def send_order(
         self,
@@ -253,7 +263,7 @@ class SpreadAlgoTemplate:
         price: float = round_to(price, leg.pricetick)
 
         # Check if the price exceeds the stop limit
-        tick: Optional[TickData] = self.get_tick(vt_symbol)
+        tick: Optional[TickData] = leg.tick
 
         if direction == Direction.LONG and tick.limit_up:
             price = min(price, tick.limit_up)
@@ -267,10 +277,11 @@ class SpreadAlgoTemplate:
 
         self.leg_orders[vt_symbol].extend(vt_orderids)
 
-        msg: str = "Issuance of orders [{}], {}, {}, {}@{}".format(
-            "|".join(vt_orderids), vt_symbol, direction.value, volume, price
-        )
-        self.write_log(msg)
+        if INFO >= self.log_level:
+            self.write_log(
+                "Issuance of orders [{}], {}, {}, {}@{}",
+                "|".join(vt_orderids), vt_symbol, direction.value, volume, price
+            )
 
     def cancel_leg_order(self, vt_symbol: str) -> None:
         """"""
@@ -332,27 +343,27 @@ class SpreadAlgoTemplate:
         self.traded_price = 0
         spread: SpreadData = self.spread
 
-        data: dict = {}
+        prices: list = []
 
-        for variable, vt_symbol in spread.variable_symbols.items():
+        for vt_symbol in spread.variable_symbols.values():
             leg: LegData = spread.legs[vt_symbol]
             trading_multiplier: int = spread.trading_multipliers[leg.vt_symbol]
 
             # Use last price for non-trading leg (trading multiplier is 0)
             if not trading_multiplier:
-                data[variable] = leg.tick.last_price
+                prices.append(leg.tick.last_price)
             else:
-                # If any leg is not traded yet, clear data dict to set traded price to 0
+                # If any leg is not traded yet, clear price list to set traded price to 0
                 leg_traded: float = self.leg_traded[leg.vt_symbol]
                 if not leg_traded:
-                    data.clear()
+                    prices.clear()
                     break
 
                 leg_cost: float = self.leg_cost[leg.vt_symbol]
-                data[variable] = leg_cost / leg_traded
+                prices.append(leg_cost / leg_traded)
 
-        if data:
-            self.traded_price = spread.parse_formula(spread.price_code, data)
+        if prices:
+            self.traded_price = spread.price_func(*prices)
             self.traded_price = round_to(self.traded_price, spread.pricetick)
         else:
             self.traded_price = 0
@@ -395,6 +406,9 @@ class SpreadStrategyTemplate:
     parameters: List[str] = []
     variables: List[str] = []
 
+    # Logs with level lower than this are dropped before formatting
+    log_level: int = INFO
+
     def __init__(
         self,
         strategy_engine: "SpreadStrategyEngine",
@@ -704,9 +718,17 @@ class SpreadStrategyTemplate:
         """"""
         self.strategy_engine.put_strategy_event(self)
 
-    def write_log(self, msg: str) -> None:
-        """"""
-        self.strategy_engine.write_strategy_log(self, msg)
+    def write_log(self, msg: str, *args, level: int = INFO) -> None:
+        """
+        Write log only if level is enabled, msg is formatted with args
+        after level checked.
+        """
+        if level < self.log_level:
+            return
+
+        if args:
+            msg = msg.format(*args)
+        self.strategy_engine.write_strategy_log(self, msg, level)
 
     def get_engine_type(self) -> EngineType:
         """"""
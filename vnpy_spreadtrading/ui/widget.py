@@ -2,7 +2,7 @@
 Widget for spread trading.
 """
 
-from typing import Dict, List, Any
+from typing import Dict, List, Callable
 
 from vnpy.event import EventEngine, Event
 from vnpy.trader.engine import MainEngine
@@ -31,6 +31,7 @@ from ..engine import (
     EVENT_SPREAD_ALGO,
     EVENT_SPREAD_STRATEGY,
 )
+from ..base import compile_price_formula
 
 
 class SpreadManager(QtWidgets.QWidget):
@@ -898,10 +899,10 @@ class SpreadDataDialog(QtWidgets.QDialog):
 
     def check_formula(self, formula: str) -> bool:
         """"""
-        data: dict = {variable: 1 for variable in "ABCDE"}
-        locals().update(data)
+        variables: List[str] = list("ABCDE")
         try:
-            result: Any = eval(formula)
+            price_func: Callable = compile_price_formula(formula, variables)
+            price_func(*[1] * len(variables))
             return True
         except Exception:
             return False
@@ -0,0 +1,504 @@
+import json
+import os
+import sys
+import traceback
+from collections import deque
+from logging import getLevelName
+from pathlib import Path
+from queue import Queue
+from threading import Thread
+from time import perf_counter_ns
+from typing import Any, BinaryIO, Callable, Deque, Dict, List, Set, TextIO
+
+from vnpy.trader.object import LogData
+from vnpy.trader.utility import get_file_path, get_folder_path
+
+if sys.platform == "win32":
+    import msvcrt
+else:
+    import fcntl
+
+
+APPEND = "append"
+COMPACT = "compact"
+
+
+class LatencyHistogram:
+    """
+    Latency histogram with fixed log-linear buckets (HDR style).
+
+    Values below 2^precision are counted exactly, larger values are
+    grouped into buckets with relative error less than 2^(1-precision).
+    """
+
+    def __init__(self, precision: int = 7, max_bits: int = 40) -> None:
+        """"""
+        self.precision: int = precision
+        self.max_bits: int = max_bits
+
+        self.sub_count: int = 1 << precision
+        self.half_count: int = self.sub_count >> 1
+        self.max_index: int = self.get_index((1 << max_bits) - 1)
+
+        self.buckets: List[int] = [0] * (self.max_index + 1)
+        self.count: int = 0
+        self.total: int = 0
+        self.min_value: int = 0
+        self.max_value: int = 0
+
+    def get_index(self, value: int) -> int:
+        """Get bucket index of value."""
+        if value < self.sub_count:
+            return value
+
+        shift: int = value.bit_length() - self.precision
+        return self.sub_count + (shift - 1) * self.half_count + (value >> shift) - self.half_count
+
+    def get_value(self, index: int) -> int:
+        """Get upper bound value of bucket."""
+        if index < self.sub_count:
+            return index
+
+        shift, offset = divmod(index - self.sub_count, self.half_count)
+        shift += 1
+        return ((offset + self.half_count + 1) << shift) - 1
+
+    def record(self, value: int) -> None:
+        """"""
+        if value < 0:
+            value = 0
+
+        index: int = self.get_index(value)
+        if index > self.max_index:
+            index = self.max_index
+        self.buckets[index] += 1
+
+        if not self.count or value < self.min_value:
+            self.min_value = value
+        if value > self.max_value:
+            self.max_value = value
+
+        self.count += 1
+        self.total += value
+
+    def get_percentile(self, percentile: float) -> int:
+        """Get value (upper bound of bucket) at percentile between 0 and 100."""
+        if not self.count:
+            return 0
+
+        target: float = self.count * percentile / 100
+        accumulated: int = 0
+
+        for index, count in enumerate(self.buckets):
+            accumulated += count
+            if count and accumulated >= target:
+                return min(self.get_value(index), self.max_value)
+
+        return self.max_value
+
+    def get_statistics(self) -> dict:
+        """Get statistics of latency in microseconds."""
+        if self.count:
+            mean: float = self.total / self.count
+        else:
+            mean: float = 0
+
+        return {
+            "count": self.count,
+            "mean": mean / 1000,
+            "min": self.min_value / 1000,
+            "p50": self.get_percentile(50) / 1000,
+            "p90": self.get_percentile(90) / 1000,
+            "p99": self.get_percentile(99) / 1000,
+            "p999": self.get_percentile(99.9) / 1000,
+            "max": self.max_value / 1000,
+        }
+
+    def clear(self) -> None:
+        """"""
+        self.buckets = [0] * (self.max_index + 1)
+        self.count = 0
+        self.total = 0
+        self.min_value = 0
+        self.max_value = 0
+
+
+class LatencyMonitor:
+    """
+    Latency histograms of each processing stage from tick to order.
+    """
+
+    def __init__(self, active: bool = True) -> None:
+        """"""
+        self.active: bool = active
+        self.histograms: Dict[str, LatencyHistogram] = {}
+
+        # Monotonic time of tick in processing, 0 if not in tick processing
+        self.tick_time: int = 0
+
+    def record(self, stage: str, latency: int) -> None:
+        """Record latency (in nanoseconds) of stage."""
+        histogram: LatencyHistogram = self.histograms.get(stage, None)
+        if not histogram:
+            histogram = LatencyHistogram()
+            self.histograms[stage] = histogram
+
+        histogram.record(latency)
+
+    def record_tick_to_order(self) -> None:
+        """Record latency from tick received to order sent."""
+        if self.tick_time:
+            self.record("tick_to_order", perf_counter_ns() - self.tick_time)
+
+    def get_statistics(self) -> Dict[str, dict]:
+        """"""
+        return {
+            stage: histogram.get_statistics()
+            for stage, histogram in self.histograms.items()
+        }
+
+    def clear(self) -> None:
+        """"""
+        self.histograms.clear()
+
+
+class TradeIdFilter:
+    """
+    Filter of duplicate trade push, only the latest trade ids within
+    the window are kept so that memory usage is bounded.
+    """
+
+    def __init__(self, window: int = 100000) -> None:
+        """"""
+        self.window: int = window
+
+        self.tradeids: Set[str] = set()
+        self.queue: Deque[str] = deque()
+
+    def __contains__(self, vt_tradeid: str) -> bool:
+        """"""
+        return vt_tradeid in self.tradeids
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.queue)
+
+    def add(self, vt_tradeid: str) -> bool:
+        """Add trade id into filter, return False if it was added before."""
+        if vt_tradeid in self.tradeids:
+            return False
+
+        self.tradeids.add(vt_tradeid)
+        self.queue.append(vt_tradeid)
+
+        # Forget the oldest trade id when window is full
+        if len(self.queue) > self.window:
+            self.tradeids.discard(self.queue.popleft())
+
+        return True
+
+    def get_statistics(self) -> dict:
+        """Get count of trade ids and estimated memory usage in bytes."""
+        memory: int = sys.getsizeof(self.tradeids) + sys.getsizeof(self.queue)
+        for vt_tradeid in self.queue:
+            memory += sys.getsizeof(vt_tradeid)
+
+        return {
+            "count": len(self.queue),
+            "window": self.window,
+            "memory": memory,
+        }
+
+    def clear(self) -> None:
+        """"""
+        self.tradeids.clear()
+        self.queue.clear()
+
+
+class TradeJournal:
+    """
+    Append-only journal of spread trades with snapshot compaction.
+
+    Records are appended as json lines on background thread. Compaction
+    writes snapshot into temp file and renames it to replace the old one,
+    then truncates the journal. All file operations are processed in the
+    same order as requested, so the journal always contains records after
+    the last snapshot.
+    """
+
+    def __init__(
+        self,
+        journal_filename: str,
+        snapshot_filename: str,
+        fsync: bool = True,
+        output: Callable = print,
+    ) -> None:
+        """"""
+        self.journal_path: Path = get_file_path(journal_filename)
+        self.snapshot_path: Path = get_file_path(snapshot_filename)
+        self.fsync: bool = fsync
+        self.output: Callable = output
+
+        self.active: bool = False
+        self.queue: Queue = Queue()
+        self.thread: Thread = None
+        self.file: TextIO = None
+
+    def load(self) -> List[dict]:
+        """Load all records in journal file."""
+        records: List[dict] = []
+
+        if not self.journal_path.exists():
+            return records
+
+        with open(self.journal_path, mode="r", encoding="UTF-8") as f:
+            for line in f:
+                # Skip incomplete line written before crash
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+
+        return records
+
+    def start(self) -> None:
+        """"""
+        if self.active:
+            return
+        self.active = True
+
+        self.repair()
+        self.file = open(self.journal_path, mode="a", encoding="UTF-8")
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop background thread after all pending records written."""
+        if not self.active:
+            return
+        self.active = False
+
+        self.queue.put(None)
+        self.thread.join()
+
+        self.file.close()
+
+    def repair(self) -> None:
+        """
+        Truncate incomplete line written before crash, so that new records
+        are not appended to it.
+        """
+        if not self.journal_path.exists():
+            return
+
+        with open(self.journal_path, mode="rb+") as f:
+            size: int = f.seek(0, os.SEEK_END)
+            if not size:
+                return
+
+            f.seek(size - 1)
+            if f.read(1) == b"\n":
+                return
+
+            f.seek(0)
+            data: bytes = f.read()
+
+            f.truncate(data.rfind(b"\n") + 1)
+            f.flush()
+
+            if self.fsync:
+                os.fsync(f.fileno())
+
+    def append(self, record: dict) -> None:
+        """Append record, ignored if journal not started."""
+        if self.active:
+            self.queue.put((APPEND, record))
+
+    def compact(self, snapshot: dict) -> None:
+        """Replace snapshot file and clear records in journal."""
+        if self.active:
+            self.queue.put((COMPACT, snapshot))
+
+    def run(self) -> None:
+        """"""
+        while True:
+            items: list = [self.queue.get()]
+
+            # Process all pending requests in one batch
+            while not self.queue.empty():
+                items.append(self.queue.get_nowait())
+
+            try:
+                if not self.process(items):
+                    break
+            except Exception:
+                self.output(f"Failed to write {self.journal_path.name}:\n{traceback.format_exc()}")
+
+    def process(self, items: list) -> bool:
+        """Process requests, return False if stop requested."""
+        for item in items:
+            if item is None:
+                self.flush()
+                return False
+
+            request, data = item
+
+            if request == APPEND:
+                self.file.write(json.dumps(data) + "\n")
+            else:
+                self.flush()
+                save_json_file(self.snapshot_path, data, self.fsync)
+
+                self.file.close()
+                self.file = open(self.journal_path, mode="w", encoding="UTF-8")
+                self.flush()
+
+        self.flush()
+        return True
+
+    def flush(self) -> None:
+        """"""
+        self.file.flush()
+
+        if self.fsync:
+            os.fsync(self.file.fileno())
+
+
+def save_json_file(filepath: Path, data: Any, fsync: bool = True) -> None:
+    """
+    Save json file atomically by writing temp file and then replacing.
+    """
+    temp_path: Path = filepath.with_name(filepath.name + ".tmp")
+
+    with open(temp_path, mode="w", encoding="UTF-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+
+        if fsync:
+            f.flush()
+            os.fsync(f.fileno())
+
+    os.replace(temp_path, filepath)
+
+
+class FileLock:
+    """
+    Exclusive lock on file shared between processes, used as context manager.
+    """
+
+    def __init__(self, filepath: Path) -> None:
+        """"""
+        self.filepath: Path = filepath
+        self.file: BinaryIO = None
+
+    def __enter__(self) -> "FileLock":
+        """"""
+        self.file = open(self.filepath, mode="a+b")
+
+        if sys.platform == "win32":
+            self.file.seek(0)
+
+            # LK_LOCK only retries for 10 seconds before raising
+            while True:
+                try:
+                    msvcrt.locking(self.file.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX)
+
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """"""
+        if sys.platform == "win32":
+            self.file.seek(0)
+            msvcrt.locking(self.file.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+
+        self.file.close()
+        self.file = None
+
+
+class LogFileSink:
+    """
+    Write logs into daily file in log folder, logs are written in batches
+    on background thread.
+    """
+
+    def __init__(self, name: str) -> None:
+        """"""
+        self.name: str = name
+
+        self.active: bool = False
+        self.queue: Queue = Queue()
+        self.thread: Thread = None
+
+    def start(self) -> None:
+        """"""
+        if self.active:
+            return
+        self.active = True
+
+        self.thread = Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def stop(self) -> None:
+        """Stop background thread after all pending logs written."""
+        if not self.active:
+            return
+        self.active = False
+
+        self.queue.put(None)
+        self.thread.join()
+
+    def write(self, log: LogData) -> None:
+        """"""
+        self.queue.put(log)
+
+    def run(self) -> None:
+        """"""
+        today: str = ""
+        f: TextIO = None
+
+        while True:
+            logs: list = [self.queue.get()]
+
+            # Write all pending logs in one batch
+            while not self.queue.empty():
+                logs.append(self.queue.get_nowait())
+
+            # Lines are grouped by date of log time
+            date_lines: Dict[str, List[str]] = {}
+            stopped: bool = False
+
+            for log in logs:
+                if log is None:
+                    stopped = True
+                    continue
+
+                date: str = log.time.strftime("%Y%m%d")
+                time: str = log.time.strftime("%Y-%m-%d %H:%M:%S.%f")
+                line: str = f"{time} {getLevelName(log.level)} {log.msg}\n"
+                date_lines.setdefault(date, []).append(line)
+
+            for date, lines in date_lines.items():
+                # Switch to file of another day
+                if date != today:
+                    if f:
+                        f.close()
+
+                    today = date
+                    file_path: Path = get_folder_path("log").joinpath(f"{self.name}_{today}.log")
+                    f = open(file_path, mode="a", encoding="UTF-8")
+
+                f.write("".join(lines))
+                f.flush()
+
+            if stopped:
+                break
+
+        if f:
+            f.close()